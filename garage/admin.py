@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Vehicle, InspectionTemplate, VehicleInspection, Photo, Sale
+from .models import Vehicle, InspectionTemplate, VehicleInspection, Photo, PhotoUpload, Sale, DailySalesRollup, VinDecode
 
 @admin.register(Vehicle)
 class VehicleAdmin(admin.ModelAdmin):
@@ -17,16 +17,39 @@ class InspectionTemplateAdmin(admin.ModelAdmin):
 class VehicleInspectionAdmin(admin.ModelAdmin):
     list_display = ['vehicle', 'template', 'status']
     list_filter = ['status']
+    list_select_related = ['vehicle', 'template']
     search_fields = ['vehicle__make', 'vehicle__model']
 
 @admin.register(Photo)
 class PhotoAdmin(admin.ModelAdmin):
     list_display = ['id', 'vehicle', 'inspection', 'uploaded_at']
     list_filter = ['uploaded_at']
+    # Inspection answers print their vehicle and template
+    list_select_related = ['vehicle', 'inspection__vehicle', 'inspection__template']
+
+@admin.register(PhotoUpload)
+class PhotoUploadAdmin(admin.ModelAdmin):
+    list_display = ['photo', 'status', 'attempts', 'next_attempt_at', 'finished_at']
+    list_filter = ['status']
+    list_select_related = ['photo']
+    readonly_fields = ['created_at', 'claimed_at', 'finished_at']
 
 @admin.register(Sale)
 class SaleAdmin(admin.ModelAdmin):
     list_display = ['vehicle', 'sale_price', 'sale_date', 'buyer_name']
+    list_select_related = ['vehicle']
     list_filter = ['sale_date']
     search_fields = ['vehicle__make', 'vehicle__model', 'buyer_name']
-    readonly_fields = ['created_at']
\ No newline at end of file
+    readonly_fields = ['created_at']
+
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(admin.ModelAdmin):
+    list_display = ['day', 'make', 'car_type', 'sales', 'revenue', 'margin', 'days_on_lot']
+    list_filter = ['car_type']
+    date_hierarchy = 'day'
+
+@admin.register(VinDecode)
+class VinDecodeAdmin(admin.ModelAdmin):
+    list_display = ['vin', 'model_year', 'error', 'fetched_at', 'expires_at']
+    search_fields = ['vin']
+    readonly_fields = ['results']
@@ -0,0 +1,183 @@
+"""
+Inventory aging: how long unsold vehicles have been on the lot, and how
+long the ones waiting for inspection or in the shop have been in that
+status, as p50/p90 and a histogram per make and per car type.
+
+The columns come from one values_list() query; with NumPy installed they
+are read into arrays once and every group is picked with a boolean mask,
+otherwise the statistics are computed in plain Python (same results,
+linear-interpolated percentiles as numpy.percentile). The result is cached
+for AGING_CACHE_TIMEOUT seconds.
+"""
+import bisect
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Vehicle
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python statistics
+    np = None
+
+AGING_CACHE_KEY = 'garage:aging'
+PERCENTILES = (50, 90)
+# Histogram bucket edges in days; the last bucket is open-ended
+HISTOGRAM_EDGES = (0, 30, 60, 90, 180)
+# Statuses whose time in status is reported
+STAGES = ('FALTA_INSPECAO', 'MECANICA')
+
+
+def histogram_labels():
+    labels = [f'{low}-{high - 1}' for low, high in zip(HISTOGRAM_EDGES, HISTOGRAM_EDGES[1:])]
+    return labels + [f'{HISTOGRAM_EDGES[-1]}+']
+
+
+def _stats_numpy(keys, values):
+    values = np.asarray(values, dtype=float)
+    groups, inverse = np.unique(np.asarray(keys, dtype=object), return_inverse=True)
+    # One sort, then every group is a contiguous slice
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.cumsum(np.bincount(inverse, minlength=len(groups)))[:-1]
+    edges = np.asarray(HISTOGRAM_EDGES + (math.inf,), dtype=float)
+    stats = {}
+    for key, group in zip(groups, np.split(values[order], bounds)):
+        stats[key] = {
+            'count': int(group.size),
+            **{f'p{q}': float(p) for q, p in zip(PERCENTILES, np.percentile(group, PERCENTILES))},
+            'histogram': np.histogram(np.maximum(group, 0), bins=edges)[0].tolist(),
+        }
+    return stats
+
+
+def _percentile(ordered, q):
+    # numpy.percentile's default (linear) method
+    position = (len(ordered) - 1) * q / 100
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _stats_python(keys, values):
+    groups = defaultdict(list)
+    for key, value in zip(keys, values):
+        groups[key].append(value)
+    stats = {}
+    for key in sorted(groups):
+        ordered = sorted(groups[key])
+        histogram = [0] * len(HISTOGRAM_EDGES)
+        for value in ordered:
+            histogram[max(bisect.bisect_right(HISTOGRAM_EDGES, value) - 1, 0)] += 1
+        stats[key] = {
+            'count': len(ordered),
+            **{f'p{q}': float(_percentile(ordered, q)) for q in PERCENTILES},
+            'histogram': histogram,
+        }
+    return stats
+
+
+def group_stats(keys, values):
+    """{key: {'count', 'p50', 'p90', 'histogram'}} of `values` (days) grouped by `keys`"""
+    if len(values) == 0:
+        return {}
+    if np is not None:
+        return _stats_numpy(keys, values)
+    return _stats_python(keys, values)
+
+
+def _rounded(stats):
+    return {
+        **stats,
+        **{f'p{q}': round(stats[f'p{q}'], 1) for q in PERCENTILES},
+    }
+
+
+def _columns_numpy(rows, now):
+    """Keys as object arrays and ages in days as float arrays"""
+    table = np.array(rows, dtype=object).reshape(-1, 5)
+    ages = [
+        np.fromiter((moment.timestamp() for moment in table[:, column]), dtype=float, count=len(table))
+        for column in (3, 4)
+    ]
+    return (table[:, 0], table[:, 1], table[:, 2], *((now - age) / 86400 for age in ages))
+
+
+def _columns_python(rows, now):
+    makes, car_types, statuses, on_lot, in_status = [], [], [], [], []
+    for make, car_type, status, created_at, status_changed_at in rows:
+        makes.append(make)
+        car_types.append(car_type)
+        statuses.append(status)
+        on_lot.append((now - created_at.timestamp()) / 86400)
+        in_status.append((now - status_changed_at.timestamp()) / 86400)
+    return makes, car_types, statuses, on_lot, in_status
+
+
+def _take(values, members):
+    """`values` at `members`: a boolean mask with NumPy, a list of indexes without"""
+    if np is not None:
+        return values[members]
+    return [values[i] for i in members]
+
+
+def build_aging(now=None):
+    """Aging figures for every unsold vehicle, from a single query"""
+    now = (now or timezone.now()).timestamp()
+    rows = list(
+        Vehicle.objects.exclude(status='VENDIDO')
+        .order_by()
+        .values_list('make', 'car_type', 'status', 'created_at', 'status_changed_at')
+    )
+    if np is not None:
+        makes, car_types, statuses, on_lot, in_status = _columns_numpy(rows, now)
+        by_stage = {stage: statuses == stage for stage in STAGES}
+        everything = np.full(len(rows), '*', dtype=object)
+    else:
+        makes, car_types, statuses, on_lot, in_status = _columns_python(rows, now)
+        by_stage = {stage: [i for i, status in enumerate(statuses) if status == stage] for stage in STAGES}
+        everything = ['*'] * len(rows)
+
+    car_type_labels = dict(Vehicle.CAR_TYPE_CHOICES)
+    status_labels = dict(Vehicle.STATUS_CHOICES)
+
+    def breakdown(keys, label=str):
+        lot = group_stats(keys, on_lot)
+        stages = {
+            stage: group_stats(_take(keys, members), _take(in_status, members))
+            for stage, members in by_stage.items()
+        }
+        return [
+            {
+                'key': key,
+                'label': label(key),
+                'days_on_lot': _rounded(stats),
+                'stages': {
+                    stage: _rounded(stages[stage][key]) for stage in STAGES if key in stages[stage]
+                },
+            }
+            for key, stats in sorted(lot.items(), key=lambda item: (-item[1]['count'], item[0]))
+        ]
+
+    overall = breakdown(everything)
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'vehicles': len(rows),
+        'histogram_labels': histogram_labels(),
+        'stages': {stage: status_labels[stage] for stage in STAGES},
+        'overall': overall[0] if overall else None,
+        'by_make': breakdown(makes),
+        'by_car_type': breakdown(car_types, lambda key: car_type_labels.get(key, key)),
+    }
+
+
+def get_aging():
+    """Cached aging figures; rebuilt at most every AGING_CACHE_TIMEOUT seconds"""
+    aging = cache.get(AGING_CACHE_KEY)
+    if aging is None:
+        aging = build_aging()
+        cache.set(AGING_CACHE_KEY, aging, settings.AGING_CACHE_TIMEOUT)
+    return aging
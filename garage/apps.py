@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class GarageConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'garage'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+        from kario.database import apply_sqlite_pragmas
+        from . import metrics, signals  # noqa: F401
+        from .search import ensure_search_triggers
+
+        metrics.install()
+
+        post_migrate.connect(ensure_search_triggers, sender=self)
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid='kario.sqlite_pragmas')
@@ -0,0 +1,158 @@
+"""
+Bulk report exports for analysis tools: Parquet when pyarrow is installed,
+gzip NDJSON otherwise.
+
+Each export is written once to MEDIA_ROOT/exports/ under a version of its
+source tables (row counts plus latest updated_at), so repeat
+downloads reuse the file and the version doubles as the ETag. Rows are
+converted in batches of BATCH_SIZE, never all at once.
+"""
+import gzip
+import hashlib
+import os
+import tempfile
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # falls back to gzip NDJSON
+    pa = pq = None
+
+BATCH_SIZE = 10000
+
+INTEGER_TYPES = {
+    'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField', 'BigIntegerField',
+    'SmallIntegerField', 'PositiveIntegerField', 'PositiveBigIntegerField', 'PositiveSmallIntegerField',
+}
+
+
+def export_format():
+    """(file extension, content type) of the exports this process writes"""
+    if pa is not None:
+        return 'parquet', 'application/vnd.apache.parquet'
+    return 'ndjson.gz', 'application/gzip'
+
+
+def exports_dir():
+    return Path(settings.MEDIA_ROOT) / 'exports'
+
+
+def timestamp_fields(model):
+    return [
+        field.name for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+
+
+def source_version(report):
+    """
+    Hash of the state of the report's source tables: one aggregate query
+    per table. The row count catches deletes, the auto_now/auto_now_add
+    timestamps inserts and saves. Every source model needs an auto_now
+    field, and queryset.update()/bulk_update() writes that change exported
+    columns must set it themselves.
+    """
+    parts = [report.name, export_format()[0]]
+    for model in report.sources:
+        stats = model._default_manager.aggregate(
+            rows=Count('pk'), **{name: Max(name) for name in timestamp_fields(model)}
+        )
+        parts.append(f"{model._meta.label}:{sorted(stats.items())}")
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()[:32]
+
+
+def export_path(report, version):
+    return exports_dir() / f'{report.filename}-{version}.{export_format()[0]}'
+
+
+def batches(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def column_field(report, queryset, name):
+    """Model field (or annotation output field) behind a report column"""
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    model = report.model
+    *relations, last = name.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.pk if last == 'pk' else model._meta.get_field(last)
+
+
+def arrow_type(field):
+    internal_type = field.get_internal_type()
+    if internal_type in INTEGER_TYPES:
+        return pa.int64()
+    if internal_type == 'DecimalField':
+        # Full precision: sums outgrow the column's own max_digits
+        return pa.decimal128(38, field.decimal_places)
+    if internal_type == 'FloatField':
+        return pa.float64()
+    if internal_type == 'BooleanField':
+        return pa.bool_()
+    if internal_type == 'DateField':
+        return pa.date32()
+    if internal_type == 'DateTimeField':
+        return pa.timestamp('us', tz='UTC')
+    return pa.string()
+
+
+def write_parquet(report, path):
+    queryset = report.queryset()
+    schema = pa.schema([pa.field(name, arrow_type(column_field(report, queryset, name))) for name in report.names])
+    to_text = [field.type == pa.string() for field in schema]
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in batches(queryset.iterator(chunk_size=BATCH_SIZE)):
+            columns = []
+            for values, field, text in zip(zip(*batch), schema, to_text):
+                if text:
+                    # UUIDs and other non-str values stored as text
+                    values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+                columns.append(pa.array(values, type=field.type))
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+
+
+def write_ndjson(report, path):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    names = report.names
+    with gzip.open(path, 'wt', encoding='utf-8') as output:
+        for batch in batches(report.rows()):
+            output.write(''.join(encoder.encode(dict(zip(names, row))) + '\n' for row in batch))
+
+
+def build_export(report, path):
+    """Write the export to a temporary file and move it into place"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=path.parent, suffix='.part')
+    os.close(fd)
+    try:
+        if pa is not None:
+            write_parquet(report, temporary)
+        else:
+            write_ndjson(report, temporary)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+    # Older versions of this report are no longer reachable
+    for stale in path.parent.glob(f'{report.filename}-*.{export_format()[0]}'):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+
+
+def get_export(report, version=None):
+    """Path of the current export of `report`, built only when its sources changed"""
+    path = export_path(report, version or source_version(report))
+    if not path.exists():
+        build_export(report, path)
+    return path
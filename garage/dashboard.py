@@ -0,0 +1,66 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import Vehicle, DailySalesRollup
+
+DASHBOARD_CACHE_KEY = 'garage:dashboard'
+DASHBOARD_VERSION_KEY = 'garage:dashboard_version'
+
+
+def build_dashboard_snapshot():
+    """Compute everything dashboard.html needs with two aggregate queries"""
+    ficha_completa = Q(inspection_total__gt=0, inspection_answered__gte=F('inspection_total'))
+
+    totals = Vehicle.objects.aggregate(
+        disponivel=Count('id', filter=Q(status='DISPONIVEL')),
+        vendido=Count('id', filter=Q(status='VENDIDO')),
+        mecanica=Count('id', filter=Q(status='MECANICA')),
+        falta_inspecao=Count('id', filter=Q(status='FALTA_INSPECAO')),
+        limpo=Count('id', filter=Q(title_status='LIMPO')),
+        nao_limpo=Count('id', filter=~Q(title_status='LIMPO')),
+        fichas_completas=Count('id', filter=ficha_completa),
+        fichas_incompletas=Count('id', filter=~ficha_completa),
+    )
+
+    # Daily rollups: one row per day and make/type, not one per sale
+    sales_by_month = DailySalesRollup.objects.annotate(
+        month=TruncMonth('day')
+    ).values('month').annotate(total=Sum('sales')).order_by('month')
+
+    return {
+        'totals': totals,
+        'fichas_completas': totals.pop('fichas_completas'),
+        'fichas_incompletas': totals.pop('fichas_incompletas'),
+        # Formatar labels no formato YYYY-MM
+        'chart_labels': [s['month'].strftime('%Y-%m') if s['month'] else '' for s in sales_by_month],
+        'chart_data': [s['total'] for s in sales_by_month],
+    }
+
+
+def dashboard_cache_key():
+    """Snapshot key for the current version; invalidate_dashboard moves it on"""
+    return f'{DASHBOARD_CACHE_KEY}:{cache.get(DASHBOARD_VERSION_KEY, 0)}'
+
+
+def get_dashboard_snapshot():
+    """
+    Cached dashboard snapshot; rebuilt on the first load after an invalidation.
+    The key is read before building, so a snapshot that raced a write lands
+    under the old version, where nobody reads it.
+    """
+    key = dashboard_cache_key()
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_dashboard_snapshot()
+        cache.set(key, snapshot, settings.DASHBOARD_CACHE_TIMEOUT)
+    return snapshot
+
+
+def invalidate_dashboard():
+    """Move to a new snapshot version once the current transaction commits"""
+    transaction.on_commit(lambda: cache.set(DASHBOARD_VERSION_KEY, uuid.uuid4().hex, None))
@@ -0,0 +1,101 @@
+"""
+Resized copies of vehicle photos for srcset.
+
+Each photo gets one WebP and one JPEG per width in PHOTO_DERIVATIVE_WIDTHS,
+written to media/images/derivatives/<Photo.storage_key>/ and recorded on
+Photo.derivatives as {"<width>": {"webp": url, "jpeg": url}}. Widths larger
+than the original are replaced by a copy at the original width, so the
+browser never gets an upscaled image.
+
+Nothing here touches the database, so it can run in upload threads and in
+build_photo_derivatives worker processes.
+"""
+import shutil
+from io import BytesIO
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from PIL import Image, ImageOps
+
+FORMATS = {
+    'webp': ('webp', 'WEBP', {'method': 4}),
+    'jpeg': ('jpg', 'JPEG', {'optimize': True, 'progressive': True}),
+}
+
+
+def media_url(file_path):
+    """MEDIA_URL address of a file under MEDIA_ROOT"""
+    relative = Path(file_path).resolve().relative_to(Path(settings.MEDIA_ROOT).resolve())
+    return f"{settings.MEDIA_URL}{relative.as_posix()}"
+
+
+def derivatives_dir(storage_key):
+    return Path(settings.MEDIA_ROOT) / 'images' / 'derivatives' / str(storage_key)
+
+
+def delete_derivatives(storage_key):
+    shutil.rmtree(derivatives_dir(storage_key), ignore_errors=True)
+
+
+def _rgb(img):
+    # JPEG has no alpha: flatten transparent images onto white
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        return background
+    return img.convert('RGB')
+
+
+def target_widths(original_width, widths):
+    """Configured widths below the original, plus the original when some were too large"""
+    below = sorted({width for width in widths if width < original_width})
+    if len(below) < len(set(widths)):
+        below.append(original_width)
+    return below
+
+
+def build_derivatives(source, storage_key, widths=None):
+    """
+    Write the derivatives of `source` (a path or file object) and return the
+    Photo.derivatives mapping. Raises OSError if the image can't be read.
+    """
+    widths = widths or settings.PHOTO_DERIVATIVE_WIDTHS
+    quality = settings.PHOTO_DERIVATIVE_QUALITY
+    target = derivatives_dir(storage_key)
+    target.mkdir(parents=True, exist_ok=True)
+
+    with Image.open(source) as img:
+        # JPEG only: let the decoder downscale by 1/2..1/8 when that still
+        # leaves enough pixels for the largest width
+        largest = max(widths)
+        img.draft('RGB', (largest, largest))
+        current = _rgb(ImageOps.exif_transpose(img))
+
+    derivatives = {}
+    # Largest first, each one resized from the previous: far less work than
+    # resampling the full image every time
+    for width in reversed(target_widths(current.width, widths)):
+        if width != current.width:
+            height = max(1, round(current.height * width / current.width))
+            current = current.resize((width, height), Image.LANCZOS, reducing_gap=2.0)
+        urls = {}
+        for name, (extension, pil_format, options) in FORMATS.items():
+            path = target / f'{width}.{extension}'
+            current.save(path, pil_format, quality=quality, **options)
+            urls[name] = media_url(path)
+        derivatives[str(width)] = urls
+    return dict(sorted(derivatives.items(), key=lambda item: int(item[0])))
+
+
+def build_from_source(storage_key, source):
+    """
+    build_photo_derivatives worker: `source` is a local path or, for photos
+    whose local copy is gone, their Cloudinary URL.
+    """
+    if source.startswith(('http://', 'https://')):
+        response = requests.get(source, timeout=30)
+        response.raise_for_status()
+        source = BytesIO(response.content)
+    return build_derivatives(source, storage_key)
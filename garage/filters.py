@@ -1,5 +1,7 @@
 import django_filters
+from django.db.models.functions import Upper
 from .models import Vehicle
+from .search import search_vehicles
 
 class VehicleFilter(django_filters.FilterSet):
     """
@@ -9,7 +11,7 @@ class VehicleFilter(django_filters.FilterSet):
     search = django_filters.CharFilter(method='filter_search', label='Buscar')
 
     # Exact match filters
-    make = django_filters.CharFilter(lookup_expr='iexact', label='Marca')
+    make = django_filters.CharFilter(method='filter_make', label='Marca')
     year = django_filters.NumberFilter(label='Ano')
     car_type = django_filters.ChoiceFilter(choices=Vehicle.CAR_TYPE_CHOICES, label='Tipo de Carro')
     status = django_filters.ChoiceFilter(choices=Vehicle.STATUS_CHOICES, label='Status')
@@ -26,15 +28,18 @@ class VehicleFilter(django_filters.FilterSet):
         model = Vehicle
         fields = ['search', 'make', 'year', 'car_type', 'status', 'title_status', 'value_min', 'value_max', 'miles_min', 'miles_max']
 
-    def filter_search(self, queryset, name, value):
+    def filter_make(self, queryset, name, value):
         """
-        Custom search filter that searches across make, model, and VIN
+        Case-insensitive make match written as UPPER(make) = X so it can use
+        the vehicle_make_upper_idx expression index (iexact can't).
         """
         if value:
-            from django.db.models import Q
-            return queryset.filter(
-                Q(make__icontains=value) |
-                Q(model__icontains=value) |
-                Q(vin__icontains=value)
-            )
+            return queryset.alias(make_upper=Upper('make')).filter(make_upper=value.upper())
         return queryset
+
+    def filter_search(self, queryset, name, value):
+        """
+        Full-text search (prefix match per word) across make, model, VIN,
+        trim, engine and color. Adds a `search_rank` annotation.
+        """
+        return search_vehicles(queryset, value)
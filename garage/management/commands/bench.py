@@ -0,0 +1,312 @@
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from garage import rollups
+from garage.models import DailySalesRollup, InspectionTemplate, Photo, Sale, Vehicle, VehicleInspection
+
+FLEET = [
+    ('Honda', ['Civic', 'Accord', 'CR-V'], 'SEDAN'),
+    ('Toyota', ['Camry', 'Corolla', 'RAV4'], 'SEDAN'),
+    ('Ford', ['F-150', 'Explorer', 'Escape'], 'TRUCK'),
+    ('Nissan', ['Altima', 'Rogue', 'Sentra'], 'SUV'),
+    ('Chevrolet', ['Silverado 1500', 'Malibu', 'Spark'], 'TRUCK'),
+    ('Kia', ['Soul', 'Sportage', 'Forte'], 'HATCHBACK'),
+]
+COLORS = ['Preto', 'Branco', 'Prata', 'Cinza', 'Azul', 'Vermelho']
+STATUSES = ['DISPONIVEL'] * 4 + ['FALTA_INSPECAO'] * 2 + ['MECANICA', 'VENDIDO', 'VENDIDO']
+TITLE_STATUSES = ['LIMPO'] * 6 + ['SALVAGE', 'REBUILT', 'OUTROS']
+TEMPLATE_COUNT = 20
+BATCH_SIZE = 2000
+
+# (name, query string) of the vehicle_list variations
+LIST_QUERIES = [
+    ('vehicle_list', {}),
+    ('vehicle_list:status', {'status': 'DISPONIVEL'}),
+    ('vehicle_list:make', {'make': 'honda'}),
+    ('vehicle_list:search', {'search': 'civic preto'}),
+    # One word matching a sixth of the fleet
+    ('vehicle_list:search_broad', {'search': 'honda'}),
+    ('vehicle_list:filters', {'car_type': 'TRUCK', 'value_min': '8000', 'miles_max': '120000', 'sort': '-price'}),
+]
+
+
+def percentile(samples, q):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[q - 1]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the created_at/updated_at values it is given"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede as telas principais (dashboard, lista, detalhe, ficha técnica e relatórios) '
+        'em um banco descartável populado com uma frota sintética'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vehicles', type=int, nargs='+', default=[1000],
+                            help='Tamanho(s) da frota, ex.: --vehicles 1000 10000 100000 (padrão: 1000)')
+        parser.add_argument('--requests', type=int, default=20, help='Requisições medidas por tela (padrão: 20)')
+        parser.add_argument('--warmup', type=int, default=2, help='Requisições descartadas antes de medir (padrão: 2)')
+        parser.add_argument('--inspections', type=int, default=8,
+                            help=f'Itens respondidos da ficha por veículo, até {TEMPLATE_COUNT} (padrão: 8)')
+        parser.add_argument('--photos', type=int, default=3, help='Fotos por veículo (padrão: 3)')
+        parser.add_argument('--seed', type=int, default=42, help='Semente dos dados sintéticos (padrão: 42)')
+        parser.add_argument('--output', default='bench.json', help='Arquivo JSON com os resultados (padrão: bench.json)')
+        parser.add_argument('--compare', help='Resultado anterior (JSON) para comparar')
+        parser.add_argument('--threshold', type=float, default=20,
+                            help='Aumento de p95 (%%) tratado como regressão (padrão: 20)')
+
+    @contextmanager
+    def bench_environment(self):
+        """
+        A throwaway copy of the database (a temporary SQLite file, or the
+        usual test_<name> database elsewhere), destroyed at the end. The
+        cache is per-process and budgets only warn, as in production. The
+        copy has no replica: every view reads from it.
+        """
+        setup_test_environment()
+        test_settings = connection.settings_dict['TEST']
+        test_name = test_settings['NAME']
+        directory = None
+        if connection.vendor == 'sqlite':
+            # On disk, like the real database, not in memory
+            directory = tempfile.TemporaryDirectory(prefix='kario-bench-')
+            test_settings['NAME'] = os.path.join(directory.name, 'bench.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(REPLICA_DATABASE=None):
+                yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings['NAME'] = test_name
+            teardown_test_environment()
+            if directory is not None:
+                directory.cleanup()
+
+    def seed(self, rng, start, stop, options):
+        """Add vehicles start..stop-1 with their inspections, photos and sales"""
+        templates = list(InspectionTemplate.objects.order_by('order'))
+        if not templates:
+            templates = InspectionTemplate.objects.bulk_create([
+                InspectionTemplate(item_name=f'Item {i + 1}', order=i + 1) for i in range(TEMPLATE_COUNT)
+            ])
+        answered = min(options['inspections'], len(templates))
+        now = timezone.now()
+
+        with explicit_timestamps(Vehicle, Sale):
+            for batch_start in range(start, stop, BATCH_SIZE):
+                vehicles, inspections, photos, sales = [], [], [], []
+                for i in range(batch_start, min(batch_start + BATCH_SIZE, stop)):
+                    make, models, car_type = rng.choice(FLEET)
+                    created_at = now - timedelta(days=rng.randint(0, 720), minutes=rng.randint(0, 1440))
+                    vehicle = Vehicle(
+                        year=rng.randint(2008, 2024), make=make, model=rng.choice(models), car_type=car_type,
+                        vin=f'BENCH{i:012d}', exterior_color=rng.choice(COLORS), miles=rng.randint(5000, 220000),
+                        value=Decimal(rng.randint(30, 400) * 100), status=rng.choice(STATUSES),
+                        title_status=rng.choice(TITLE_STATUSES), created_at=created_at, updated_at=created_at,
+                        status_changed_at=min(created_at + timedelta(days=rng.randint(0, 30)), now),
+                        inspection_total=len(templates), inspection_answered=answered,
+                    )
+                    vehicles.append(vehicle)
+                    inspections.extend(
+                        VehicleInspection(vehicle=vehicle, template=template, status=rng.choice(['SIM', 'NAO']))
+                        for template in rng.sample(templates, answered)
+                    )
+                    photos.extend(
+                        Photo(vehicle=vehicle, image_url=f'{settings.MEDIA_URL}images/bench/{i}-{n}.jpg')
+                        for n in range(options['photos'])
+                    )
+                    if vehicle.status == 'VENDIDO':
+                        sale_date = min(created_at + timedelta(days=rng.randint(1, 120)), now).date()
+                        sales.append(Sale(
+                            vehicle=vehicle, sale_price=vehicle.value + rng.randint(-10, 40) * 100,
+                            sale_date=sale_date, buyer_name='Comprador', created_at=now, updated_at=now,
+                        ))
+                Vehicle.objects.bulk_create(vehicles)
+                VehicleInspection.objects.bulk_create(inspections)
+                Photo.objects.bulk_create(photos)
+                Sale.objects.bulk_create(sales)
+        # bulk_create skips the signals that maintain the rollups
+        rollups.rebuild(Sale, DailySalesRollup)
+
+    def scenarios(self, rng):
+        """(name, method, path, data) of every request measured"""
+        sample = list(Vehicle.objects.order_by('?').values_list('pk', flat=True)[:3])
+        sample += sample[:1] * (3 - len(sample))
+        templates = list(InspectionTemplate.objects.values_list('pk', flat=True))
+        answers = {f'status_{pk}': rng.choice(['SIM', 'NAO']) for pk in templates}
+        scenarios = [('dashboard', 'get', reverse('dashboard'), None)]
+        scenarios += [(name, 'get', reverse('vehicle_list'), query) for name, query in LIST_QUERIES]
+        scenarios += [
+            ('vehicle_detail', 'get', reverse('vehicle_detail', args=[sample[0]]), None),
+            ('inspection_update:get', 'get', reverse('inspection_update', args=[sample[1]]), None),
+            ('inspection_update:post', 'post', reverse('inspection_update', args=[sample[2]]), answers),
+            ('report_inventory', 'get', reverse('report_inventory'), None),
+            ('report_mechanics', 'get', reverse('report_mechanics'), None),
+            ('report_sales', 'get', reverse('report_sales'), None),
+        ]
+        return scenarios
+
+    def request(self, client, method, path, data):
+        # Every request pays for its own work: nothing served from the cache
+        cache.clear()
+        response = getattr(client, method)(path, data or {})
+        if response.streaming:
+            # Reports do their work while streaming
+            for _ in response.streaming_content:
+                pass
+        if response.status_code >= 400:
+            raise CommandError(f'{method.upper()} {path}: HTTP {response.status_code}')
+        return response
+
+    def measure(self, client, method, path, data, options):
+        for _ in range(options['warmup']):
+            self.request(client, method, path, data)
+
+        timings, queries = [], []
+        for _ in range(options['requests']):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                self.request(client, method, path, data)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+
+        # Separate pass: tracemalloc slows everything down
+        tracemalloc.start()
+        try:
+            self.request(client, method, path, data)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'queries': max(queries),
+            'peak_kb': round(peak / 1024, 1),
+        }
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        user, _ = User.objects.get_or_create(username='bench', defaults={'is_staff': True})
+        client = Client()
+        client.force_login(user)
+
+        results = {}
+        seeded = 0
+        for size in sorted(set(options['vehicles'])):
+            self.stdout.write(f'Populando {size} veículo(s)...')
+            started = time.perf_counter()
+            self.seed(rng, seeded, size, options)
+            seeded = size
+            self.stdout.write(f'  pronto em {time.perf_counter() - started:.1f}s')
+
+            results[str(size)] = run = {}
+            for name, method, path, data in self.scenarios(rng):
+                run[name] = stats = self.measure(client, method, path, data, options)
+                self.stdout.write(
+                    f'  {name:<24} p50 {stats["p50_ms"]:>9.1f} ms  p95 {stats["p95_ms"]:>9.1f} ms  '
+                    f'{stats["queries"]:>4} consulta(s)  pico {stats["peak_kb"]:>9.1f} KB'
+                )
+        return results
+
+    def compare(self, results, previous_path, threshold):
+        """Print the differences with a previous run; returns the regressions"""
+        try:
+            with open(previous_path, encoding='utf-8') as f:
+                previous = json.load(f)['results']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'Não foi possível ler {previous_path}: {e}')
+
+        regressions = []
+        self.stdout.write(f'\nComparação com {previous_path}:')
+        for size, run in results.items():
+            before_run = previous.get(size)
+            if before_run is None:
+                self.stdout.write(f'  {size} veículo(s): sem medição anterior')
+                continue
+            self.stdout.write(f'  {size} veículo(s):')
+            for name, stats in run.items():
+                before = before_run.get(name)
+                if before is None:
+                    continue
+                change = (stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+                line = (
+                    f'    {name:<24} p95 {before["p95_ms"]:>9.1f} → {stats["p95_ms"]:>9.1f} ms ({change:+.0f}%)  '
+                    f'consultas {before["queries"]} → {stats["queries"]}'
+                )
+                if stats['queries'] > before['queries'] or change > threshold:
+                    regressions.append(f'{size}/{name}')
+                    self.stdout.write(self.style.WARNING(line))
+                else:
+                    self.stdout.write(line)
+        return regressions
+
+    def handle(self, *args, **options):
+        if min(options['vehicles']) < 1 or options['requests'] < 1 or options['warmup'] < 0:
+            raise CommandError('--vehicles e --requests devem ser maiores que zero')
+
+        access_log = logging.getLogger('garage.access')
+        level = access_log.level
+        # Access lines and budget warnings for every measured request would
+        # drown the report, which has the query counts anyway
+        access_log.setLevel(logging.ERROR)
+        try:
+            with override_settings(
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                QUERY_BUDGETS_STRICT=False,
+            ), self.bench_environment():
+                results = self.run(options)
+        finally:
+            access_log.setLevel(level)
+
+        output = {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'options': {name: options[name] for name in ('vehicles', 'requests', 'warmup', 'inspections', 'photos', 'seed')},
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'✅ Resultados salvos em {options["output"]}'))
+
+        if options['compare']:
+            regressions = self.compare(results, options['compare'], options['threshold'])
+            if regressions:
+                raise CommandError(f'{len(regressions)} regressão(ões): {", ".join(regressions)}')
+            self.stdout.write(self.style.SUCCESS('✅ Nenhuma regressão'))
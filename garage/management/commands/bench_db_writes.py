@@ -0,0 +1,146 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+BENCH_ALIAS = 'bench_writes'
+TABLE = 'bench_db_writes'
+
+
+def write_load(alias_settings, pragmas, writer, transactions, rows):
+    """
+    One writer process, like a gunicorn worker: `transactions` transactions
+    that each read, then insert `rows` rows (the shape of an import
+    upsert). Returns (committed, locked, seconds).
+    """
+    settings.SQLITE_PRAGMAS = pragmas
+    connections.settings[BENCH_ALIAS] = alias_settings
+    connection = connections[BENCH_ALIAS]
+    committed = locked = 0
+    started = time.perf_counter()
+    try:
+        for n in range(transactions):
+            try:
+                with transaction.atomic(using=BENCH_ALIAS), connection.cursor() as cursor:
+                    cursor.execute(f'SELECT COUNT(*) FROM {TABLE} WHERE writer = %s', [writer])
+                    cursor.executemany(
+                        f'INSERT INTO {TABLE} (writer, n, payload) VALUES (%s, %s, %s)',
+                        [(writer, n, 'x' * 200) for _ in range(rows)],
+                    )
+                committed += 1
+            except OperationalError as e:
+                if 'locked' not in str(e) and 'busy' not in str(e):
+                    raise
+                locked += 1
+            if not alias_settings['CONN_MAX_AGE']:
+                # No persistent connections: a new one for every request
+                connection.close()
+    finally:
+        connection.close()
+    return committed, locked, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a vazão de escrita com vários processos escrevendo ao mesmo tempo, '
+        'comparando a configuração padrão do banco com a configuração ajustada'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=3, help='Processos escrevendo ao mesmo tempo (padrão: 3)')
+        parser.add_argument('--transactions', type=int, default=300, help='Transações por processo (padrão: 300)')
+        parser.add_argument('--rows', type=int, default=10, help='Linhas inseridas por transação (padrão: 10)')
+
+    def configurations(self, default, directory):
+        """(label, connection settings, pragmas) of each configuration to compare"""
+        if default['ENGINE'] == 'django.db.backends.sqlite3':
+            # A scratch file, never the real database
+            scratch = {**default, 'NAME': os.path.join(directory, 'bench.sqlite3')}
+            return [
+                ('SQLite padrão', {**scratch, 'OPTIONS': {}, 'CONN_MAX_AGE': 0}, {}),
+                ('SQLite ajustado (WAL, IMMEDIATE)', {**scratch, 'CONN_MAX_AGE': None}, settings.SQLITE_PRAGMAS),
+            ]
+        without_pool = {key: value for key, value in default['OPTIONS'].items() if key != 'pool'}
+        configurations = [
+            ('Conexão por requisição', {**default, 'OPTIONS': without_pool, 'CONN_MAX_AGE': 0}, {}),
+            ('Conexões persistentes', {**default, 'OPTIONS': without_pool, 'CONN_MAX_AGE': 600}, {}),
+        ]
+        if 'pool' in default['OPTIONS']:
+            configurations.append(('Pool de conexões', {**default, 'CONN_MAX_AGE': 0}, {}))
+        return configurations
+
+    @contextmanager
+    def bench_connection(self, alias_settings, pragmas):
+        """The benchmark connection, in this process, with `pragmas` applied"""
+        settings.SQLITE_PRAGMAS, original = pragmas, settings.SQLITE_PRAGMAS
+        connections.settings[BENCH_ALIAS] = alias_settings
+        try:
+            yield connections[BENCH_ALIAS]
+        finally:
+            connections[BENCH_ALIAS].close()
+            del connections[BENCH_ALIAS]
+            del connections.settings[BENCH_ALIAS]
+            settings.SQLITE_PRAGMAS = original
+
+    def prepare(self, alias_settings, pragmas):
+        with self.bench_connection(alias_settings, pragmas) as connection, connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+            cursor.execute(
+                f'CREATE TABLE {TABLE} (id {self.id_type(alias_settings)} PRIMARY KEY, '
+                'writer integer NOT NULL, n integer NOT NULL, payload text NOT NULL)'
+            )
+            cursor.execute(f'CREATE INDEX {TABLE}_writer ON {TABLE} (writer)')
+
+    def drop(self, alias_settings, pragmas):
+        with self.bench_connection(alias_settings, pragmas) as connection, connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    @staticmethod
+    def id_type(alias_settings):
+        if alias_settings['ENGINE'] == 'django.db.backends.sqlite3':
+            return 'integer'
+        return 'bigint GENERATED BY DEFAULT AS IDENTITY'
+
+    def handle(self, *args, **options):
+        if min(options['writers'], options['transactions'], options['rows']) < 1:
+            raise CommandError('--writers, --transactions e --rows devem ser maiores que zero')
+
+        default = connections.settings['default']
+        # Each writer opens its own connections
+        context = multiprocessing.get_context('fork')
+        self.stdout.write(
+            f'{options["writers"]} processo(s) x {options["transactions"]} transação(ões) '
+            f'de {options["rows"]} linha(s):'
+        )
+        with tempfile.TemporaryDirectory(prefix='kario-writes-') as directory:
+            for label, alias_settings, pragmas in self.configurations(default, directory):
+                self.prepare(alias_settings, pragmas)
+                try:
+                    with ProcessPoolExecutor(max_workers=options['writers'], mp_context=context) as pool:
+                        started = time.perf_counter()
+                        results = list(pool.map(
+                            write_load,
+                            [alias_settings] * options['writers'], [pragmas] * options['writers'],
+                            range(options['writers']),
+                            [options['transactions']] * options['writers'], [options['rows']] * options['writers'],
+                        ))
+                        elapsed = time.perf_counter() - started
+                finally:
+                    self.drop(alias_settings, pragmas)
+
+                committed = sum(result[0] for result in results)
+                locked = sum(result[1] for result in results)
+                line = (
+                    f'  {label:<34} {committed / elapsed:>9,.0f} transações/s  '
+                    f'{committed * options["rows"] / elapsed:>10,.0f} linhas/s  '
+                    f'{locked} erro(s) "database is locked"'
+                )
+                self.stdout.write(self.style.WARNING(line) if locked else line)
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark concluído!'))
@@ -0,0 +1,156 @@
+import csv
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from garage import normalization
+from garage.management.commands.import_vehicles import HEADER_ROWS, MIN_COLUMNS
+
+SAMPLE_MODELS = [
+    'Civic', 'Accord', 'Camry', 'Corolla', 'Rogue', 'Altima', 'Sentra', 'Silverado 1500',
+    'Ram 1500', 'Grand Caravan', 'Challenger', 'Charger', 'Explorer', 'Edge', 'Fiesta',
+    'Focus', 'EcoSport', 'Forester', 'Impreza', 'Soul', 'Spark', 'Mirage', 'Sportage',
+    'Compass', 'CX-9', 'Xterra', 'Malibu', 'Elantra', 'Jetta Wagon', 'Scion tC',
+]
+
+# Pre-engine implementation from import_vehicles.py, kept for comparison
+
+
+def legacy_clean_value(value):
+    if not value or value.strip() == '':
+        return None
+    value = value.strip()
+    if ',' in value and any(char.isdigit() for char in value):
+        value = value.replace(',', '')
+    if value.startswith('$'):
+        value = value.replace('$', '').replace('.', '')
+    return value
+
+
+def legacy_clean_miles(miles_str):
+    if not miles_str:
+        return 0
+    miles_str = legacy_clean_value(miles_str)
+    if not miles_str:
+        return 0
+    miles_str = re.sub(r'[^\d.]', '', miles_str)
+    try:
+        return int(float(miles_str))
+    except (ValueError, TypeError):
+        return 0
+
+
+def legacy_clean_value_price(value_str):
+    if not value_str:
+        return 0
+    value_str = legacy_clean_value(value_str)
+    if not value_str:
+        return 0
+    value_str = re.sub(r'[^\d.]', '', value_str)
+    try:
+        return float(value_str)
+    except (ValueError, TypeError):
+        return 0
+
+
+def legacy_determine_car_type(make, model):
+    model_upper = model.upper() if model else ''
+    if any(x in model_upper for x in ['ROGUE', 'ECOSPORT', 'FORESTER', 'SPORTAGE',
+                                      'EDGE', 'EXPLORER', 'COMPASS', 'CX-9', 'X-5', 'XTERRA']):
+        return 'SUV'
+    if any(x in model_upper for x in ['SILVERADO', 'RAM']):
+        return 'PICKUP'
+    if any(x in model_upper for x in ['CARAVAN']):
+        return 'VAN'
+    if 'COUPE' in model_upper or 'TC' in model_upper or 'CHALLENGER' in model_upper or 'CHARGER' in model_upper:
+        return 'COUPE'
+    if any(x in model_upper for x in ['WAGON', 'SOUL', 'SPARK', 'FIESTA', 'MIRAGE', 'IMPREZA']):
+        return 'HATCHBACK'
+    return 'SEDAN'
+
+
+def legacy_rows(rows):
+    return [
+        (legacy_determine_car_type(make, model), legacy_clean_miles(miles), legacy_clean_value_price(price))
+        for make, model, miles, price in rows
+    ]
+
+
+def engine_rows(rows):
+    return [
+        (normalization.determine_car_type(make, model), normalization.clean_miles(miles),
+         normalization.clean_value_price(price))
+        for make, model, miles, price in rows
+    ]
+
+
+def engine_columns(rows):
+    makes, models, miles, prices = zip(*rows) if rows else ((), (), (), ())
+    return list(zip(
+        normalization.car_type_column(makes, models),
+        normalization.clean_miles_column(miles),
+        normalization.clean_value_price_column(prices),
+    ))
+
+
+class Command(BaseCommand):
+    help = 'Compara linhas/s da normalização do importador antes e depois do motor compilado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Linhas sintéticas (padrão: 100000)')
+        parser.add_argument('--file', help='Usa as colunas de um CSV do inventário em vez de dados sintéticos')
+        parser.add_argument('--repeat', type=int, default=3, help='Melhor de N execuções (padrão: 3)')
+
+    def sample_rows(self, count):
+        rng = random.Random(42)
+        return [
+            ('', rng.choice(SAMPLE_MODELS), f'{rng.randint(1, 250000):,}', f'${rng.randint(2, 40)},{rng.choice(["000", "500", "990"])}')
+            for _ in range(count)
+        ]
+
+    def file_rows(self, path):
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                for _ in range(HEADER_ROWS):
+                    next(reader, None)
+                return [(row[4], row[5], row[13], row[16]) for row in reader if len(row) >= MIN_COLUMNS]
+        except OSError as e:
+            raise CommandError(f'Não foi possível abrir {path}: {e}')
+
+    def timed(self, func, rows, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func(rows)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
+
+    def handle(self, *args, **options):
+        rows = self.file_rows(options['file']) if options['file'] else self.sample_rows(options['rows'])
+        if not rows:
+            raise CommandError('Nenhuma linha para medir')
+        repeat = max(options['repeat'], 1)
+
+        self.stdout.write(f'{len(rows)} linha(s), melhor de {repeat}:')
+        baseline = None
+        results = {}
+        for label, func in [('antes (por linha)', legacy_rows),
+                            ('motor (por linha)', engine_rows),
+                            ('motor (colunas)', engine_columns)]:
+            results[label], elapsed = self.timed(func, rows, repeat)
+            rate = len(rows) / elapsed if elapsed else float('inf')
+            baseline = baseline or rate
+            self.stdout.write(f'  {label:<20} {rate:>12,.0f} linhas/s  ({rate / baseline:.1f}x)')
+
+        # Only intended difference: PICKUP was never a valid car_type
+        expected = [('TRUCK' if car_type == 'PICKUP' else car_type, miles, price)
+                    for car_type, miles, price in results['antes (por linha)']]
+        mismatches = sum(
+            expected != result for label, result in results.items() if label != 'antes (por linha)'
+        )
+        if mismatches:
+            raise CommandError('Resultados diferentes da implementação anterior')
+        self.stdout.write(self.style.SUCCESS('✅ Resultados idênticos (PICKUP → TRUCK)'))
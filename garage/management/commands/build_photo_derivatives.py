@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from garage.derivatives import build_from_source
+from garage.models import Photo
+
+
+def photo_source(photo):
+    """Local copy when it still exists, otherwise the stored image URL"""
+    if photo.google_drive_id and os.path.exists(photo.google_drive_id):
+        return photo.google_drive_id
+    if photo.image_url.startswith(settings.MEDIA_URL):
+        local = Path(settings.MEDIA_ROOT) / photo.image_url[len(settings.MEDIA_URL):]
+        if local.exists():
+            return str(local)
+    return photo.image_url
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera as versões redimensionadas (WebP/JPEG) das fotos que ainda não as têm, '
+        'distribuindo o trabalho entre vários processos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                            help='Processos em paralelo (padrão: número de CPUs)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Fotos por lote (padrão: 200)')
+        parser.add_argument('--force', action='store_true', help='Refaz também as fotos que já têm versões')
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--processes e --batch-size devem ser maiores que zero')
+
+        photos = Photo.objects.only('pk', 'image_url', 'google_drive_id', 'content_hash').order_by('pk')
+        if not options['force']:
+            photos = photos.filter(derivatives={})
+        # Photos with identical bytes share one set of derivatives
+        pending = {}
+        for photo in photos:
+            pending.setdefault(photo.storage_key, []).append(photo)
+        pending = list(pending.values())
+        if not pending:
+            self.stdout.write(self.style.SUCCESS('✅ Todas as fotos já têm versões redimensionadas!'))
+            return
+
+        self.stdout.write(f'{len(pending)} imagem(ns) para processar em {options["processes"]} processo(s)...')
+        built, errors = 0, []
+        # Forked workers keep the settings (and test overrides) of this
+        # process. The pool forks on demand, so the connection is closed
+        # before every batch: a worker never inherits the parent's socket
+        # and opens its own if it needs one.
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=options['processes'], mp_context=context) as pool:
+            for start in range(0, len(pending), options['batch_size']):
+                batch = pending[start:start + options['batch_size']]
+                connections.close_all()
+                futures = {
+                    pool.submit(build_from_source, group[0].storage_key, photo_source(group[0])): group
+                    for group in batch
+                }
+                done = []
+                for future in as_completed(futures):
+                    group = futures[future]
+                    try:
+                        derivatives = future.result()
+                    except Exception as e:
+                        errors.append(f'{group[0].pk}: {e}')
+                        continue
+                    for photo in group:
+                        photo.derivatives = derivatives
+                    done.extend(group)
+                # Database writes stay in this process
+                Photo.objects.bulk_update(done, ['derivatives'])
+                built += len(done)
+                self.stdout.write(f'  {start + len(batch)}/{len(pending)} imagem(ns) processada(s)')
+
+        if errors:
+            self.stdout.write(self.style.WARNING(f'\n⚠ Fotos com erro ({len(errors)}):'))
+            for error in errors[:10]:
+                self.stdout.write(f'  - {error}')
+        self.stdout.write(self.style.SUCCESS(f'✅ Versões geradas para {built} foto(s)!'))
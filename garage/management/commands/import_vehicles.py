@@ -0,0 +1,206 @@
+import csv
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from garage.models import Vehicle, InspectionTemplate
+from garage.dashboard import invalidate_dashboard
+from garage.normalization import (
+    car_type_column, clean_miles_column, clean_value, clean_value_price_column,
+)
+
+# Inventory spreadsheet export: main header + sub-header
+HEADER_ROWS = 2
+MIN_COLUMNS = 17
+
+# Columns overwritten when a VIN is already in the database. Not status or
+# general_notes: the lot's workflow (sold, in the shop) and staff notes win
+# over the spreadsheet. Leaving status alone also keeps status_changed_at
+# right, which only Vehicle.save() maintains.
+UPSERT_FIELDS = [
+    'year', 'make', 'model', 'engine', 'transmission', 'train', 'car_type',
+    'exterior_color', 'miles', 'mpg', 'title_status', 'title_problem_description',
+    'value', 'updated_by', 'updated_at', 'inspection_total',
+]
+
+# Bound parameters per IN (...) list, well under every backend's limit
+IN_CHUNK = 500
+
+
+def chunks(items, size=IN_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def column(row, index):
+    return clean_value(row[index]) if len(row) > index else None
+
+
+def parse_row(row):
+    """
+    CSV row -> Vehicle field dict, None for rows without enough data.
+    Raises ValueError for rows that look like vehicles but can't be imported.
+    """
+    if len(row) < MIN_COLUMNS:
+        return None
+
+    status_col = row[1]
+    year, make, model = column(row, 3), column(row, 4), column(row, 5)
+    if not year or not make or not model:
+        return None
+    try:
+        year = int(year)
+    except ValueError:
+        raise ValueError(f"Ano inválido '{year}'")
+
+    vin = column(row, 2)
+    if vin and len(vin) > 17:
+        raise ValueError(f"VIN inválido '{vin}'")
+
+    clean_title = column(row, 15) or 'NO'
+    title_status = 'LIMPO' if clean_title.upper() == 'YES' else 'REBUILT'
+
+    return {
+        'year': year,
+        'make': make,
+        'model': model,
+        'trim': '',
+        # NULL, not '', so VIN-less rows don't collide on the unique index
+        'vin': vin,
+        'engine': column(row, 9) or '',
+        'transmission': column(row, 10) or '',
+        'train': column(row, 11) or '',
+        'exterior_color': column(row, 12) or '',
+        'interior_color': '',
+        # Raw; converted per batch by normalize_batch()
+        'miles': row[13],
+        'mpg': column(row, 14) or '',
+        'title_status': title_status,
+        'title_problem_description': '' if title_status == 'LIMPO' else 'Título Rebuilt - Verificar documentação',
+        'value': row[16],
+        'general_notes': f'Importado do CSV - Status original: {status_col}',
+        'status': 'DISPONIVEL' if status_col.upper() in ('E', 'SE') else 'FALTA_INSPECAO',
+    }
+
+
+def normalize_batch(rows):
+    """Fill the columns that are parsed for the whole batch at once"""
+    car_types = car_type_column([data['make'] for data in rows], [data['model'] for data in rows])
+    miles = clean_miles_column([data['miles'] for data in rows])
+    values = clean_value_price_column([data['value'] for data in rows])
+    for data, car_type, row_miles, value in zip(rows, car_types, miles, values):
+        data['car_type'] = car_type
+        data['miles'] = row_miles
+        data['value'] = value
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa veículos do CSV do inventário. Lê o arquivo em streaming e grava em lotes '
+        '(bulk_create); veículos com VIN já cadastrado são atualizados.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Veículos por transação (padrão: 1000)')
+        parser.add_argument('--dry-run', action='store_true', help='Valida o arquivo sem gravar nada')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size deve ser maior que zero')
+        self.dry_run = options['dry_run']
+        self.template_count = InspectionTemplate.objects.count()
+        self.user = User.objects.filter(is_staff=True).order_by('pk').first()
+        self.stats = {'created': 0, 'updated': 0, 'skipped': 0}
+        errors = []
+        started = time.monotonic()
+
+        try:
+            csvfile = open(options['csv_file'], newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f'Não foi possível abrir {options["csv_file"]}: {e}')
+
+        with csvfile:
+            reader = csv.reader(csvfile)
+            for _ in range(HEADER_ROWS):
+                next(reader, None)
+
+            batch = {}
+            processed = 0
+            for row_num, row in enumerate(reader, start=HEADER_ROWS + 1):
+                processed += 1
+                try:
+                    data = parse_row(row)
+                except ValueError as e:
+                    errors.append(f'Linha {row_num}: {e}')
+                    data = None
+                if data is None:
+                    self.stats['skipped'] += 1
+                    continue
+
+                # A VIN repeated inside one batch would hit the same row twice in
+                # one upsert; the last occurrence wins, as it would row by row.
+                key = data['vin'] or ('row', row_num)
+                if key in batch:
+                    self.stats['skipped'] += 1
+                batch[key] = data
+                if len(batch) >= options['batch_size']:
+                    self.write_batch(list(batch.values()))
+                    batch = {}
+                    self.progress(processed, started)
+
+            if batch:
+                self.write_batch(list(batch.values()))
+            self.progress(processed, started)
+
+        if not self.dry_run and (self.stats['created'] or self.stats['updated']):
+            invalidate_dashboard()
+
+        self.report(errors, time.monotonic() - started)
+
+    def write_batch(self, rows):
+        normalize_batch(rows)
+        vins = [data['vin'] for data in rows if data['vin']]
+
+        # Rows whose VIN is already stored are updated rather than created
+        existing = sum(Vehicle.objects.filter(vin__in=chunk).count() for chunk in chunks(vins))
+        self.stats['updated'] += existing
+        self.stats['created'] += len(rows) - existing
+        if self.dry_run:
+            return
+
+        vehicles = [
+            Vehicle(**data, updated_by=self.user, inspection_total=self.template_count)
+            for data in rows
+        ]
+        with transaction.atomic():
+            Vehicle.objects.bulk_create(
+                vehicles,
+                update_conflicts=True,
+                unique_fields=['vin'],
+                update_fields=UPSERT_FIELDS,
+            )
+
+    def progress(self, processed, started):
+        elapsed = time.monotonic() - started
+        rate = processed / elapsed if elapsed else 0
+        self.stdout.write(f'  {processed} linha(s) processada(s) ({rate:.0f}/s)')
+
+    def report(self, errors, elapsed):
+        self.stdout.write('')
+        if self.dry_run:
+            self.stdout.write(self.style.WARNING('Simulação (--dry-run): nada foi gravado'))
+        self.stdout.write(f'✓ Veículos novos: {self.stats["created"]}')
+        self.stdout.write(f'✓ Veículos atualizados: {self.stats["updated"]}')
+        self.stdout.write(f'⊘ Linhas puladas: {self.stats["skipped"]}')
+
+        if errors:
+            self.stdout.write(self.style.WARNING(f'\n⚠ Erros encontrados ({len(errors)}):'))
+            for error in errors[:10]:
+                self.stdout.write(f'  - {error}')
+            if len(errors) > 10:
+                self.stdout.write(f'  ... e mais {len(errors) - 10} erros')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Importação concluída em {elapsed:.1f}s!'))
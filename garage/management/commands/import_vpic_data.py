@@ -0,0 +1,76 @@
+import csv
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from garage.models import VinWmi, VinPattern, VinPlant
+from garage.vin_offline import reset_decoder
+
+SEED_DIR = Path(__file__).resolve().parents[2] / 'data' / 'vpic'
+
+# file name -> (model, columns); every file is optional
+FILES = {
+    'wmi.csv': (VinWmi, ['code', 'make', 'manufacturer', 'vehicle_type']),
+    'patterns.csv': (VinPattern, ['wmi', 'vds', 'year_from', 'year_to', 'model', 'trim', 'engine']),
+    'plants.csv': (VinPlant, ['wmi', 'code', 'city', 'country']),
+}
+
+INT_COLUMNS = {'year_from', 'year_to'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa o subconjunto local do vPIC usado pela decodificação offline de VIN. '
+        'O diretório pode ter wmi.csv (code,make,manufacturer,vehicle_type), '
+        'patterns.csv (wmi,vds,year_from,year_to,model,trim,engine; vds = posições 4-8, * = qualquer) '
+        'e plants.csv (wmi,code,city,country; code = posição 11). '
+        'Sem diretório, carrega os dados que acompanham o sistema: WMIs e, para as marcas '
+        'mais comuns no pátio, modelos por linha (chassi) e fábricas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', nargs='?', default=str(SEED_DIR))
+        parser.add_argument('--keep', action='store_true', help='Não apaga os dados existentes antes de importar')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def read_rows(self, path, columns):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                values = {}
+                for column in columns:
+                    value = (row.get(column) or '').strip()
+                    if column in INT_COLUMNS:
+                        value = int(value) if value else None
+                    elif column in ('code', 'wmi', 'vds'):
+                        value = value.upper()
+                    values[column] = value
+                yield values
+
+    def handle(self, *args, **options):
+        directory = Path(options['directory'])
+        if not directory.is_dir():
+            raise CommandError(f'Diretório não encontrado: {directory}')
+
+        found = [name for name in FILES if (directory / name).exists()]
+        if not found:
+            raise CommandError(f'Nenhum de {", ".join(FILES)} em {directory}')
+
+        with transaction.atomic():
+            for name in found:
+                model, columns = FILES[name]
+                if not options['keep']:
+                    model.objects.all().delete()
+
+                batch, total = [], 0
+                for values in self.read_rows(directory / name, columns):
+                    batch.append(model(**values))
+                    if len(batch) >= options['batch_size']:
+                        model.objects.bulk_create(batch, ignore_conflicts=True)
+                        total += len(batch)
+                        batch = []
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+                total += len(batch)
+                self.stdout.write(f'  {name}: {total} linha(s)')
+
+        reset_decoder()
+        self.stdout.write(self.style.SUCCESS('✅ Dados do vPIC importados!'))
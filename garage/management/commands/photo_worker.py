@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from garage.uploads import process_uploads
+
+
+class Command(BaseCommand):
+    help = 'Envia para o Cloudinary as fotos que estão na fila de upload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Processa a fila até esvaziar e sai')
+        parser.add_argument('--workers', type=int, default=None, help='Uploads simultâneos (padrão: PHOTO_UPLOAD_WORKERS)')
+        parser.add_argument('--batch-size', type=int, default=None, help='Fotos reservadas por rodada (padrão: 4x workers)')
+        parser.add_argument('--poll-interval', type=float, default=5, help='Segundos entre verificações da fila (padrão: 5)')
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or settings.PHOTO_UPLOAD_WORKERS
+        if workers < 1:
+            raise CommandError('--workers deve ser maior que zero')
+        batch_size = options['batch_size']
+        total_uploaded = total_failed = 0
+
+        if not options['once']:
+            self.stdout.write(f'Aguardando fotos na fila ({workers} upload(s) simultâneo(s))... Ctrl+C para sair')
+
+        try:
+            while True:
+                close_old_connections()
+                uploaded, failed = process_uploads(workers, batch_size)
+                total_uploaded += uploaded
+                total_failed += failed
+                if uploaded or failed:
+                    self.stdout.write(f'  {uploaded} foto(s) enviada(s), {failed} falha(s)')
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {total_uploaded} foto(s) enviada(s) para o Cloudinary, {total_failed} falha(s)!'
+        ))
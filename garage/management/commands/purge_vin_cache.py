@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from garage.vin import evict_expired
+
+class Command(BaseCommand):
+    help = 'Remove do cache de VIN as entradas expiradas e as mais antigas acima do limite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-rows', type=int, default=None, help='Limite de linhas (padrão: VIN_DECODE_CACHE_MAX_ROWS)')
+
+    def handle(self, *args, **options):
+        deleted = evict_expired(options['max_rows'])
+        self.stdout.write(self.style.SUCCESS(f'✅ {deleted} entrada(s) removida(s) do cache de VIN!'))
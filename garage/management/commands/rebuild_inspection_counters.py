@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from garage.models import Vehicle
+from garage.dashboard import invalidate_dashboard
+
+class Command(BaseCommand):
+    help = 'Recalcula os contadores de progresso da ficha técnica de todos os veículos'
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            updated = Vehicle.refresh_inspection_counters()
+            invalidate_dashboard()
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Contadores recalculados para {updated} veículo(s)!'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from garage.models import DailySalesRollup, Sale
+from garage.dashboard import invalidate_dashboard
+from garage.rollups import rebuild
+
+class Command(BaseCommand):
+    help = 'Recalcula as tabelas diárias de vendas (quantidade, receita, margem e dias no pátio) a partir das vendas'
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            rows = rebuild(Sale, DailySalesRollup)
+            invalidate_dashboard()
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {rows} linha(s) de resumo diário recalculada(s)!'))
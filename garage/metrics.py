@@ -0,0 +1,225 @@
+"""
+Per-request instrumentation.
+
+RequestMetricsMiddleware counts the queries and times the database,
+template rendering and outbound HTTP calls (requests, Cloudinary, httpx) of
+each request. The figures go out as a Server-Timing header and as one JSON
+line on the garage.access logger.
+
+QUERY_BUDGETS maps URL names to the most queries a request may run; going
+over logs a warning, or raises QueryBudgetExceeded when
+QUERY_BUDGETS_STRICT is set (kario/test_settings.py does).
+
+The measurements live in a context variable, so hooks installed once by
+install() attribute time to whichever request is running in the current
+thread or task.
+"""
+import functools
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('garage.access')
+
+_current = ContextVar('garage_request_metrics', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more queries than its QUERY_BUDGETS entry allows"""
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.outbound_calls = 0
+        self.outbound_time = 0.0
+        # Nested template renders / HTTP layers are timed once, at the top
+        self._depth = {'template': 0, 'outbound': 0}
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'ext;dur={self.outbound_time * 1000:.1f};desc="{self.outbound_calls} calls"',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ])
+
+
+def current():
+    """Metrics of the request being handled, None outside requests"""
+    return _current.get()
+
+
+@contextmanager
+def timed(kind):
+    """Add the time spent in the block to the current request ('template' or 'outbound')"""
+    metrics = _current.get()
+    if metrics is None or metrics._depth[kind]:
+        yield
+        return
+    metrics._depth[kind] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics._depth[kind] -= 1
+        if kind == 'template':
+            metrics.template_time += elapsed
+        else:
+            metrics.outbound_calls += 1
+            metrics.outbound_time += elapsed
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - start
+
+
+def _install_query_wrapper(sender=None, connection=None, **kwargs):
+    # On the connection object itself: connections are per thread, and under
+    # ASGI the queries of a request run in a thread other than its middleware
+    if _query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_wrapper)
+
+
+def _timed_method(cls, name, kind):
+    original = getattr(cls, name)
+    if getattr(original, '_garage_timed', False):
+        return
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        with timed(kind):
+            return original(*args, **kwargs)
+
+    wrapper._garage_timed = True
+    setattr(cls, name, wrapper)
+
+
+def _timed_coroutine(cls, name, kind):
+    original = getattr(cls, name)
+    if getattr(original, '_garage_timed', False):
+        return
+
+    @functools.wraps(original)
+    async def wrapper(*args, **kwargs):
+        with timed(kind):
+            return await original(*args, **kwargs)
+
+    wrapper._garage_timed = True
+    setattr(cls, name, wrapper)
+
+
+def install():
+    """
+    Hook queries, template rendering and outbound HTTP; called from
+    GarageConfig.ready(). The hooks cost one context variable lookup outside
+    requests.
+    """
+    import httpx
+    import urllib3
+    from django.db.backends.signals import connection_created
+    from django.template.backends.django import Template
+
+    connection_created.connect(_install_query_wrapper, dispatch_uid='garage.metrics.queries')
+    for connection in connections.all(initialized_only=True):
+        _install_query_wrapper(connection=connection)
+
+    # The backend template: what render() and TemplateResponse call, once per page
+    _timed_method(Template, 'render', 'template')
+    # urllib3 carries both requests and the Cloudinary SDK
+    _timed_method(urllib3.connectionpool.HTTPConnectionPool, 'urlopen', 'outbound')
+    _timed_method(httpx.Client, 'send', 'outbound')
+    _timed_coroutine(httpx.AsyncClient, 'send', 'outbound')
+
+
+def _url_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.url_name if match else None
+
+
+def check_budget(url_name, metrics):
+    budget = settings.QUERY_BUDGETS.get(url_name)
+    if budget is None or metrics.queries <= budget:
+        return
+    message = f'{url_name}: {metrics.queries} queries, budget is {budget}'
+    if settings.QUERY_BUDGETS_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning('Query budget exceeded: %s', message)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Async under ASGI, so async views (decode_vin) aren't run in a thread
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        user = getattr(request, 'user', None)
+        return self.finish(request, response, metrics, user.pk if user and user.is_authenticated else None)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        # Copied into the threads sync_to_async runs the ORM in
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        # request.user would load the user synchronously
+        user = await request.auser() if hasattr(request, 'auser') else None
+        return self.finish(request, response, metrics, user.pk if user and user.is_authenticated else None)
+
+    def finish(self, request, response, metrics, user_id):
+        # Streamed bodies are produced after this point: the figures cover
+        # the view up to the first byte
+        response['Server-Timing'] = metrics.server_timing()
+        url_name = _url_name(request)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': url_name,
+            'status': response.status_code,
+            'streaming': response.streaming,
+            'duration_ms': round(metrics.total_time * 1000, 1),
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_time * 1000, 1),
+            'template_ms': round(metrics.template_time * 1000, 1),
+            'outbound_calls': metrics.outbound_calls,
+            'outbound_ms': round(metrics.outbound_time * 1000, 1),
+            'user': user_id,
+        }))
+        check_budget(url_name, metrics)
+        return response
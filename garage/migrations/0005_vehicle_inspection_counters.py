@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    """Both counters for the whole fleet in a single UPDATE"""
+    db = schema_editor.connection.alias
+    Vehicle = apps.get_model('garage', 'Vehicle')
+    InspectionTemplate = apps.get_model('garage', 'InspectionTemplate')
+    VehicleInspection = apps.get_model('garage', 'VehicleInspection')
+
+    answered = (
+        VehicleInspection.objects.using(db)
+        .filter(vehicle=OuterRef('pk'))
+        .exclude(status='NAO_RESPONDIDO')
+        .order_by()
+        .values('vehicle')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Vehicle.objects.using(db).update(
+        inspection_answered=Coalesce(Subquery(answered), 0),
+        inspection_total=InspectionTemplate.objects.using(db).count(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garage', '0004_photo_google_drive_id_photo_uploaded_by_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='inspection_answered',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Itens Respondidos'),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='inspection_total',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total de Itens'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:33
+
+import django.db.models.deletion
+import garage.search
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for sql in garage.search.FTS_CREATE_SQL + garage.search.FTS_TRIGGERS_SQL + garage.search.FTS_REBUILD_SQL:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        Vehicle = apps.get_model('garage', 'Vehicle')
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for index in garage.search.postgres_search_indexes():
+            schema_editor.add_index(Vehicle, index)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {garage.search.FTS_TABLE}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {garage.search.FTS_TABLE}')
+    elif vendor == 'postgresql':
+        Vehicle = apps.get_model('garage', 'Vehicle')
+        for index in garage.search.postgres_search_indexes():
+            schema_editor.remove_index(Vehicle, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garage', '0006_vehicle_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleSearchIndex',
+            fields=[
+                ('vehicle', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='garage.vehicle')),
+                ('document', garage.search.SearchDocumentField(db_column='garage_vehicle_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'garage_vehicle_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:35
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garage', '0007_vehicle_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['sale_date', 'id'], name='sale_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='vehicle_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['make'], name='vehicle_make_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(django.db.models.functions.text.Upper('make'), name='vehicle_make_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['car_type'], name='vehicle_car_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['title_status'], name='vehicle_title_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['status', 'title_status', 'inspection_answered', 'inspection_total', 'id'], name='vehicle_dashboard_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicleinspection',
+            index=models.Index(fields=['vehicle', 'status'], name='inspection_vehicle_status_idx'),
+        ),
+    ]
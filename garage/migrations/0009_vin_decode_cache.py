@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garage', '0008_query_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VinDecode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vin', models.CharField(max_length=17)),
+                ('model_year', models.CharField(blank=True, default='', max_length=4)),
+                ('results', models.JSONField(default=list)),
+                ('error', models.CharField(blank=True, default='', max_length=255)),
+                ('fetched_at', models.DateTimeField(db_index=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('vin', 'model_year'), name='vindecode_vin_year_uniq')],
+            },
+        ),
+    ]
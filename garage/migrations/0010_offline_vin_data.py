@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garage', '0009_vin_decode_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VinWmi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=6, unique=True)),
+                ('make', models.CharField(max_length=100)),
+                ('manufacturer', models.CharField(blank=True, default='', max_length=200)),
+                ('vehicle_type', models.CharField(blank=True, default='', max_length=100)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VinPattern',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wmi', models.CharField(max_length=6)),
+                ('vds', models.CharField(max_length=5)),
+                ('year_from', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('year_to', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('model', models.CharField(max_length=100)),
+                ('trim', models.CharField(blank=True, default='', max_length=100)),
+                ('engine', models.CharField(blank=True, default='', max_length=200)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['wmi', 'vds'], name='vinpattern_wmi_vds_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VinPlant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wmi', models.CharField(max_length=6)),
+                ('code', models.CharField(max_length=1)),
+                ('city', models.CharField(blank=True, default='', max_length=100)),
+                ('country', models.CharField(blank=True, default='', max_length=100)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('wmi', 'code'), name='vinplant_wmi_code_uniq')],
+            },
+        ),
+    ]
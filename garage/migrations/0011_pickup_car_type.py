@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def pickup_to_truck(apps, schema_editor):
+    # The CSV importer used to store 'PICKUP', which isn't a car_type choice
+    Vehicle = apps.get_model('garage', 'Vehicle')
+    Vehicle.objects.filter(car_type='PICKUP').update(car_type='TRUCK')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garage', '0010_offline_vin_data'),
+    ]
+
+    operations = [
+        migrations.RunPython(pickup_to_truck, migrations.RunPython.noop),
+    ]
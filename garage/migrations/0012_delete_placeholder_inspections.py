@@ -0,0 +1,39 @@
+from django.db import migrations, transaction
+
+BATCH_SIZE = 5000
+
+
+def delete_placeholders(apps, schema_editor):
+    """
+    Unanswered checklist items no longer need a row. Delete the blank ones
+    (no answer, no note, no photo) in batches so each transaction stays small.
+    """
+    VehicleInspection = apps.get_model('garage', 'VehicleInspection')
+    db = schema_editor.connection.alias
+
+    placeholders = (
+        VehicleInspection.objects.using(db)
+        .filter(status='NAO_RESPONDIDO', photos__isnull=True)
+        .exclude(observation__gt='')
+        .order_by()
+        .values_list('pk', flat=True)
+    )
+    while True:
+        with transaction.atomic(using=db):
+            batch = list(placeholders[:BATCH_SIZE])
+            if not batch:
+                break
+            VehicleInspection.objects.using(db).filter(pk__in=batch).delete()
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ('garage', '0011_pickup_car_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_placeholders, migrations.RunPython.noop),
+    ]
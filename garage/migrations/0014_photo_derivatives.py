@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garage', '0013_photo_upload_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Versões redimensionadas'),
+        ),
+    ]
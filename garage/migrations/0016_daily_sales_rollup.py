@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:19
+
+from django.db import migrations, models
+
+from garage.rollups import rebuild
+
+
+def build_rollups(apps, schema_editor):
+    rebuild(
+        apps.get_model('garage', 'Sale'), apps.get_model('garage', 'DailySalesRollup'),
+        using=schema_editor.connection.alias,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garage', '0015_photo_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('make', models.CharField(max_length=100)),
+                ('car_type', models.CharField(max_length=20)),
+                ('sales', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('margin', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('days_on_lot', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'sales'], name='salesrollup_day_sales_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'make', 'car_type'), name='salesrollup_day_make_type_uniq')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_status_changed_at(apps, schema_editor):
+    """No status history exists: the last update is the closest guess"""
+    Vehicle = apps.get_model('garage', 'Vehicle')
+    Vehicle.objects.using(schema_editor.connection.alias).update(status_changed_at=models.F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garage', '0016_daily_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='status_changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Status desde'),
+        ),
+        migrations.RunPython(backfill_status_changed_at, migrations.RunPython.noop),
+    ]
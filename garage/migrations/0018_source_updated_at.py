@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:56
+
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    """Rows never edited since they were created, as far as anyone knows"""
+    for name in ['Sale', 'VehicleInspection']:
+        model = apps.get_model('garage', name)
+        model.objects.using(schema_editor.connection.alias).update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garage', '0017_vehicle_status_changed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inspectiontemplate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='vehicleinspection',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
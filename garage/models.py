@@ -1,7 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, FilteredRelation, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Upper
 from django.contrib.auth.models import User
+from django.utils import timezone
 import uuid
 
+from .search import SearchDocumentField
+
 class Vehicle(models.Model):
     STATUS_CHOICES = [
         ('FALTA_INSPECAO', 'Falta Inspeção'),
@@ -47,32 +52,124 @@ class Vehicle(models.Model):
     title_problem_description = models.TextField(blank=True, null=True)
     value = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='FALTA_INSPECAO')
+    status_changed_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name='Status desde')
     general_notes = models.TextField(blank=True, null=True, verbose_name='Observações Gerais')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='updated_vehicles', verbose_name='Atualizado por')
+    inspection_answered = models.PositiveIntegerField(default=0, editable=False, verbose_name='Itens Respondidos')
+    inspection_total = models.PositiveIntegerField(default=0, editable=False, verbose_name='Total de Itens')
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination in vehicle_list: (sort key, id)
+            models.Index(fields=['created_at', 'id'], name='vehicle_created_id_idx'),
+            models.Index(fields=['value', 'id'], name='vehicle_value_id_idx'),
+            models.Index(fields=['miles', 'id'], name='vehicle_miles_id_idx'),
+            models.Index(fields=['year', 'id'], name='vehicle_year_id_idx'),
+            # VehicleFilter / reports: status filter with the default ordering
+            models.Index(fields=['status', 'created_at', 'id'], name='vehicle_status_created_idx'),
+            models.Index(fields=['make'], name='vehicle_make_idx'),
+            models.Index(Upper('make'), name='vehicle_make_upper_idx'),
+            models.Index(fields=['car_type'], name='vehicle_car_type_idx'),
+            models.Index(fields=['title_status'], name='vehicle_title_status_idx'),
+            # Covers the dashboard aggregate without touching the table
+            models.Index(
+                fields=['status', 'title_status', 'inspection_answered', 'inspection_total', 'id'],
+                name='vehicle_dashboard_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.year} {self.make} {self.model}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Status as loaded, so save() can tell when it changes
+        if 'status' in instance.__dict__:
+            instance._loaded_status = instance.status
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.inspection_total:
+            self.inspection_total = InspectionTemplate.objects.count()
+        if not self._state.adding and self.status != getattr(self, '_loaded_status', self.status):
+            self.status_changed_at = timezone.now()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'status' in update_fields:
+                kwargs['update_fields'] = [*update_fields, 'status_changed_at']
+        super().save(*args, **kwargs)
+        self._loaded_status = self.status
+
+    @property
+    def cover_photo(self):
+        """First uploaded photo; reads `cover_photos` when the list view prefetched it"""
+        if hasattr(self, 'cover_photos'):
+            return self.cover_photos[0] if self.cover_photos else None
+        return self.photos.order_by('uploaded_at', 'id').first()
     
     def inspection_progress(self):
-        total = InspectionTemplate.objects.count()
-        if total == 0:
+        if self.inspection_total == 0:
             return 0
-        completed = self.inspections.exclude(status='NAO_RESPONDIDO').count()
-        return int((completed / total) * 100)
+        return int((self.inspection_answered / self.inspection_total) * 100)
     
     def is_inspection_complete(self):
-        total = InspectionTemplate.objects.count()
-        completed = self.inspections.exclude(status='NAO_RESPONDIDO').count()
-        return completed == total and total > 0
+        return self.inspection_total > 0 and self.inspection_answered >= self.inspection_total
+
+    def inspection_checklist(self):
+        """
+        Every InspectionTemplate with this vehicle's answer, in one query.
+        Items never answered have no VehicleInspection row and come back with
+        status NAO_RESPONDIDO and answer_id None.
+        """
+        return InspectionTemplate.objects.annotate(
+            answer=FilteredRelation('vehicleinspection', condition=Q(vehicleinspection__vehicle=self)),
+        ).annotate(
+            answer_id=F('answer__id'),
+            status=Coalesce('answer__status', Value('NAO_RESPONDIDO')),
+            observation=F('answer__observation'),
+        ).order_by('order', 'pk')
+
+    @classmethod
+    def refresh_inspection_counters(cls, vehicles=None):
+        """
+        Recompute inspection_answered/inspection_total with a single UPDATE.
+        `vehicles` is an iterable of ids (or a queryset); None means the whole fleet.
+        """
+        answered = (
+            VehicleInspection.objects
+            .filter(vehicle=OuterRef('pk'))
+            .exclude(status='NAO_RESPONDIDO')
+            .order_by()
+            .values('vehicle')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        queryset = cls.objects.all() if vehicles is None else cls.objects.filter(pk__in=vehicles)
+        return queryset.update(
+            inspection_answered=Coalesce(Subquery(answered), 0),
+            inspection_total=InspectionTemplate.objects.count(),
+        )
+
+class VehicleSearchIndex(models.Model):
+    """
+    SQLite FTS5 table kept in sync with Vehicle by triggers (see garage.search).
+    Read-only from Django: only used to join/filter/rank vehicle searches.
+    """
+    vehicle = models.OneToOneField(Vehicle, primary_key=True, on_delete=models.DO_NOTHING, db_constraint=False, related_name='search_index')
+    document = SearchDocumentField(db_column='garage_vehicle_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'garage_vehicle_fts'
 
 class InspectionTemplate(models.Model):
     item_name = models.CharField(max_length=200)
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order']
@@ -80,6 +177,11 @@ class InspectionTemplate(models.Model):
     def __str__(self):
         return self.item_name
 
+    def save(self, *args, **kwargs):
+        # post_save updates every Vehicle.inspection_total; keep it in this transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 class VehicleInspection(models.Model):
     STATUS_CHOICES = [
         ('SIM', 'Sim'),
@@ -93,13 +195,22 @@ class VehicleInspection(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='NAO_RESPONDIDO')
     observation = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['vehicle', 'template']
+        indexes = [
+            models.Index(fields=['vehicle', 'status'], name='inspection_vehicle_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.vehicle} - {self.template.item_name}"
 
+    def save(self, *args, **kwargs):
+        # post_save refreshes the vehicle's counters; keep it in this transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 class Photo(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='photos', null=True, blank=True)
@@ -110,10 +221,77 @@ class Photo(models.Model):
     description = models.CharField(max_length=200, blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='uploaded_photos', verbose_name='Enviado por')
+    # SHA-256 of the original; photos with the same bytes share the local
+    # blob, the Cloudinary asset and the derivatives (see garage.uploads)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, verbose_name='SHA-256')
+    # {"<width>": {"webp": url, "jpeg": url}}, see garage.derivatives
+    derivatives = models.JSONField(default=dict, blank=True, verbose_name='Versões redimensionadas')
     
     def __str__(self):
         return f"Photo {self.id}"
 
+    @property
+    def storage_key(self):
+        """Name of the derivatives directory: the content hash, or the id for photos stored before hashing"""
+        return self.content_hash or str(self.pk)
+
+    def _srcset(self, fmt):
+        return ', '.join(f"{urls[fmt]} {width}w" for width, urls in self.derivatives.items())
+
+    @property
+    def webp_srcset(self):
+        return self._srcset('webp')
+
+    @property
+    def jpeg_srcset(self):
+        return self._srcset('jpeg')
+
+    @property
+    def thumbnail_url(self):
+        """Smallest JPEG derivative, the original until they exist"""
+        if not self.derivatives:
+            return self.image_url
+        return next(iter(self.derivatives.values()))['jpeg']
+
+    @property
+    def display_url(self):
+        """Largest JPEG derivative, the original until they exist"""
+        if not self.derivatives:
+            return self.image_url
+        return list(self.derivatives.values())[-1]['jpeg']
+
+class PhotoUpload(models.Model):
+    """
+    Queue entry for sending a staged photo to Cloudinary (see garage.uploads).
+    The photo is usable from its local copy until the upload succeeds.
+    """
+    STATUS_CHOICES = [
+        ('PENDENTE', 'Pendente'),
+        ('ENVIANDO', 'Enviando'),
+        ('CONCLUIDO', 'Concluído'),
+        ('FALHOU', 'Falhou'),
+    ]
+
+    photo = models.OneToOneField(Photo, on_delete=models.CASCADE, related_name='upload')
+    local_path = models.CharField(max_length=500)
+    folder = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDENTE')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # photo_worker polling: due entries by status
+            models.Index(fields=['status', 'next_attempt_at'], name='photoupload_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Upload {self.photo_id} ({self.status})"
+
 class Sale(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     vehicle = models.OneToOneField(Vehicle, on_delete=models.CASCADE, related_name='sale')
@@ -122,6 +300,102 @@ class Sale(models.Model):
     buyer_name = models.CharField(max_length=200, blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sale_date', 'id'], name='sale_date_id_idx'),
+        ]
     
     def __str__(self):
-        return f"Venda - {self.vehicle}"
\ No newline at end of file
+        return f"Venda - {self.vehicle}"
+
+class DailySalesRollup(models.Model):
+    """
+    Sales of one day for one make and car type, kept current by the Sale
+    signals (see rollups.py) so charts never scan the sales table.
+    """
+    day = models.DateField()
+    make = models.CharField(max_length=100)
+    car_type = models.CharField(max_length=20)
+    sales = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # sale_price - vehicle.value
+    margin = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Sum of sale_date - vehicle.created_at, in days
+    days_on_lot = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'make', 'car_type'], name='salesrollup_day_make_type_uniq'),
+        ]
+        indexes = [
+            # Covers the dashboard's monthly chart
+            models.Index(fields=['day', 'sales'], name='salesrollup_day_sales_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.make} {self.car_type}: {self.sales}"
+
+class VinDecode(models.Model):
+    """Cached vPIC DecodeVin response (raw Results payload) per VIN + model year"""
+    vin = models.CharField(max_length=17)
+    model_year = models.CharField(max_length=4, blank=True, default='')
+    results = models.JSONField(default=list)
+    error = models.CharField(max_length=255, blank=True, default='')
+    fetched_at = models.DateTimeField(db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vin', 'model_year'], name='vindecode_vin_year_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.vin} ({self.model_year or 'sem ano'})"
+
+
+class VinWmi(models.Model):
+    """World Manufacturer Identifier (VIN positions 1-3, or 1-3 + 12-14)"""
+    code = models.CharField(max_length=6, unique=True)
+    make = models.CharField(max_length=100)
+    manufacturer = models.CharField(max_length=200, blank=True, default='')
+    vehicle_type = models.CharField(max_length=100, blank=True, default='')
+
+    def __str__(self):
+        return f"{self.code} - {self.make}"
+
+
+class VinPattern(models.Model):
+    """VDS (positions 4-8) pattern for a WMI; '*' matches any character"""
+    wmi = models.CharField(max_length=6)
+    vds = models.CharField(max_length=5)
+    year_from = models.PositiveSmallIntegerField(null=True, blank=True)
+    year_to = models.PositiveSmallIntegerField(null=True, blank=True)
+    model = models.CharField(max_length=100)
+    trim = models.CharField(max_length=100, blank=True, default='')
+    engine = models.CharField(max_length=200, blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['wmi', 'vds'], name='vinpattern_wmi_vds_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.wmi}{self.vds} - {self.model}"
+
+
+class VinPlant(models.Model):
+    """Assembly plant by WMI and VIN position 11"""
+    wmi = models.CharField(max_length=6)
+    code = models.CharField(max_length=1)
+    city = models.CharField(max_length=100, blank=True, default='')
+    country = models.CharField(max_length=100, blank=True, default='')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['wmi', 'code'], name='vinplant_wmi_code_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.wmi}/{self.code} - {self.city}"
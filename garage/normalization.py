@@ -0,0 +1,215 @@
+"""
+Value normalization for inventory imports.
+
+Car-type rules live in data/car_types.csv (keyword,car_type; earlier rows
+win) and are compiled once into an Aho-Corasick automaton, so classifying a
+model name is a single pass over its characters regardless of the number
+of keywords. The numeric parsers recognise well-formed numbers with one
+precompiled pattern before falling back to the generic clean-up, and the
+*_column functions normalize a whole CSV column at once, parsing each
+distinct value only once.
+"""
+import csv
+import re
+from collections import deque
+from pathlib import Path
+
+CAR_TYPE_RULES_FILE = Path(__file__).resolve().parent / 'data' / 'car_types.csv'
+
+DEFAULT_CAR_TYPE = 'SEDAN'
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a list of (keyword, label) rules.
+    match() returns the label of the earliest rule found anywhere in the
+    text, the same answer as checking the rules one by one with `in`.
+    """
+
+    def __init__(self, rules):
+        self.labels = []
+        self.goto = [{}]
+        # Best (lowest) rule index ending at each state, fail links included
+        self.best = [None]
+
+        for priority, (keyword, label) in enumerate(rules):
+            self.labels.append(label)
+            state = 0
+            for char in keyword:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.best.append(None)
+                state = next_state
+            if self.best[state] is None or priority < self.best[state]:
+                self.best[state] = priority
+
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                inherited = self.best[self.fail[next_state]]
+                if inherited is not None and (self.best[next_state] is None or inherited < self.best[next_state]):
+                    self.best[next_state] = inherited
+
+    def match(self, text, default=None):
+        goto, fail, best = self.goto, self.fail, self.best
+        state = 0
+        found = None
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            priority = best[state]
+            if priority is not None and (found is None or priority < found):
+                found = priority
+                if found == 0:
+                    break
+        return default if found is None else self.labels[found]
+
+
+def load_car_type_rules(path=CAR_TYPE_RULES_FILE):
+    with open(path, newline='', encoding='utf-8') as f:
+        return [
+            (row['keyword'].strip().upper(), row['car_type'].strip().upper())
+            for row in csv.DictReader(f)
+            if row['keyword'].strip()
+        ]
+
+
+_car_type_matcher = None
+
+
+def car_type_matcher():
+    global _car_type_matcher
+    if _car_type_matcher is None:
+        _car_type_matcher = KeywordMatcher(load_car_type_rules())
+    return _car_type_matcher
+
+
+def determine_car_type(make, model):
+    """Tipo do carro a partir do modelo (SEDAN quando nenhuma regra casa)"""
+    return car_type_matcher().match(model.upper() if model else '', DEFAULT_CAR_TYPE)
+
+
+class _KeepOnly(dict):
+    """str.translate table that drops every character not accepted by `keep`"""
+
+    def __init__(self, keep):
+        super().__init__()
+        self.keep = keep
+
+    def __missing__(self, codepoint):
+        value = codepoint if self.keep(chr(codepoint)) else None
+        self[codepoint] = value
+        return value
+
+
+# Same characters as the old [^\d.] regex: Unicode decimal digits and '.'
+_NUMERIC_ONLY = _KeepOnly(lambda char: char == '.' or char.isdecimal())
+
+# Well-formed spreadsheet numbers ('45120', '45,120', '$12,500', '3.5'),
+# which can skip the generic clean-up entirely
+_PLAIN_NUMBER_RE = re.compile(r'(\$?)(\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d+))?', re.ASCII)
+
+
+def clean_value(value):
+    """Limpar e converter valores"""
+    if not value:
+        return None
+    value = value.strip()
+    if not value:
+        return None
+
+    # Remover vírgulas de números
+    if ',' in value and any(char.isdigit() for char in value):
+        value = value.replace(',', '')
+
+    # Remover $ de valores monetários
+    if value[0] == '$':
+        value = value.replace('$', '').replace('.', '')
+
+    return value
+
+
+def _plain_number(value):
+    """Number string the generic clean-up would produce, or None if `value` isn't plain"""
+    match = _PLAIN_NUMBER_RE.fullmatch(value)
+    if match is None:
+        return None
+    currency, digits, fraction = match.groups()
+    if ',' in digits:
+        digits = digits.replace(',', '')
+    if fraction is None:
+        return digits
+    # clean_value() drops the decimal point of currency values
+    return digits + fraction if currency else f'{digits}.{fraction}'
+
+
+def _number(value_str, convert):
+    if not value_str:
+        return 0
+    number = _plain_number(value_str.strip())
+    if number is None:
+        value_str = clean_value(value_str)
+        if not value_str:
+            return 0
+        number = value_str.translate(_NUMERIC_ONLY)
+    try:
+        return convert(number)
+    except (ValueError, TypeError):
+        return 0
+
+
+def _to_int(value):
+    return int(float(value))
+
+
+def clean_miles(miles_str):
+    """Limpar valor de milhas"""
+    return _number(miles_str, _to_int)
+
+
+def clean_value_price(value_str):
+    """Limpar valor de preço"""
+    return _number(value_str, float)
+
+
+# --- Column API ---------------------------------------------------------------
+
+def _map_distinct(func, values):
+    # Inventory columns repeat a lot (models, colors, round prices)
+    cache = {}
+    result = []
+    append = result.append
+    for value in values:
+        try:
+            append(cache[value])
+        except KeyError:
+            cache[value] = converted = func(value)
+            append(converted)
+    return result
+
+
+def clean_value_column(values):
+    return _map_distinct(clean_value, values)
+
+
+def clean_miles_column(values):
+    return _map_distinct(clean_miles, values)
+
+
+def clean_value_price_column(values):
+    return _map_distinct(clean_value_price, values)
+
+
+def car_type_column(makes, models):
+    return _map_distinct(lambda model: determine_car_type(None, model), models)
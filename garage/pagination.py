@@ -0,0 +1,128 @@
+import base64
+import json
+
+from django.db.models import Q
+
+# Public sort keys accepted in ?sort= (prefix with '-' for descending)
+SORT_FIELDS = {
+    'created': 'created_at',
+    'price': 'value',
+    'miles': 'miles',
+    'year': 'year',
+    # search_rank annotation from garage.search (lower is more relevant)
+    'relevance': 'search_rank',
+}
+DEFAULT_SORT = '-created'
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over (sort field, pk).
+    Each page is a single index range seek + LIMIT, so deep pages cost the
+    same as the first one. Cursors are opaque base64 tokens of the boundary row.
+    """
+
+    def __init__(self, queryset, sort=None, per_page=24):
+        sort = sort or DEFAULT_SORT
+        key = sort.lstrip('-')
+        if key not in SORT_FIELDS or SORT_FIELDS[key] not in self._sortable(queryset):
+            sort, key = DEFAULT_SORT, DEFAULT_SORT.lstrip('-')
+
+        self.queryset = queryset
+        self.sort = sort
+        self.field = SORT_FIELDS[key]
+        self.descending = sort.startswith('-')
+        self.per_page = per_page
+
+    @staticmethod
+    def _sortable(queryset):
+        fields = {field.name for field in queryset.model._meta.concrete_fields}
+        return fields | set(queryset.query.annotations)
+
+    def encode_cursor(self, obj):
+        values = [str(getattr(obj, self.field)), str(obj.pk)]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return (sort value, pk) or None for a missing/tampered cursor"""
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            value, pk = json.loads(base64.urlsafe_b64decode(padded))
+            model = self.queryset.model
+            if self.field in self.queryset.query.annotations:
+                value = float(value)
+            else:
+                value = model._meta.get_field(self.field).to_python(value)
+            return value, model._meta.pk.to_python(pk)
+        except Exception:
+            return None
+
+    def _seek(self, queryset, boundary, descending):
+        """Rows strictly after `boundary` in the given direction"""
+        value, pk = boundary
+        # field <= v AND (field < v OR pk < id) keeps a plain range on the
+        # leading index column so the database can seek instead of scanning.
+        if descending:
+            return queryset.filter(
+                Q(**{f'{self.field}__lte': value}),
+                Q(**{f'{self.field}__lt': value}) | Q(pk__lt=pk),
+            )
+        return queryset.filter(
+            Q(**{f'{self.field}__gte': value}),
+            Q(**{f'{self.field}__gt': value}) | Q(pk__gt=pk),
+        )
+
+    def _ordered(self, queryset, descending):
+        if descending:
+            return queryset.order_by(f'-{self.field}', '-pk')
+        return queryset.order_by(self.field, 'pk')
+
+    def page(self, after=None, before=None):
+        after = self.decode_cursor(after)
+        before = None if after else self.decode_cursor(before)
+
+        if before:
+            # Walk backwards from the cursor, then restore display order
+            descending = not self.descending
+            queryset = self._seek(self._ordered(self.queryset, descending), before, descending)
+            rows = list(queryset[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            queryset = self._ordered(self.queryset, self.descending)
+            if after:
+                queryset = self._seek(queryset, after, self.descending)
+            rows = list(queryset[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = after is not None
+
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1]) if rows and has_next else None,
+            previous_cursor=self.encode_cursor(rows[0]) if rows and has_previous else None,
+        )
@@ -0,0 +1,114 @@
+"""
+Read replica routing.
+
+Views decorated with use_replica run their reads against the
+REPLICA_DATABASE alias; everything else, and every write, goes to the
+primary. A replica lags behind, so after a POST (or any other unsafe
+request) ReplicaPinMiddleware sets a short-lived cookie, and while it is
+there the client reads from the primary and sees its own changes.
+
+With REPLICA_DATABASE unset the decorator does nothing.
+"""
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'kario_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica = ContextVar('garage_replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Send the reads of the block to the replica"""
+    token = _replica.set(True)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def _streamed_on_replica(chunks):
+    # Streamed bodies run their queries after the view returned
+    chunks = iter(chunks)
+    while True:
+        with replica_reads():
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+        yield chunk
+
+
+def is_pinned(request):
+    return PIN_COOKIE in request.COOKIES
+
+
+def use_replica(view):
+    """
+    Read-only view opt-in: safe requests read from the replica, unless the
+    client wrote something in the last REPLICA_PIN_SECONDS.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not settings.REPLICA_DATABASE or request.method not in SAFE_METHODS or is_pinned(request):
+            return view(request, *args, **kwargs)
+        with replica_reads():
+            response = view(request, *args, **kwargs)
+        if response.streaming and not response.is_async:
+            response.streaming_content = _streamed_on_replica(response.streaming_content)
+        return response
+
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica.get():
+            return settings.REPLICA_DATABASE or None
+        return None
+
+    def db_for_write(self, model, **hints):
+        # An object loaded from the replica would otherwise save back to it
+        instance = hints.get('instance')
+        if settings.REPLICA_DATABASE and instance is not None and instance._state.db == settings.REPLICA_DATABASE:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The same data on both sides
+        databases = {DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE}
+        if settings.REPLICA_DATABASE and {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+
+class ReplicaPinMiddleware:
+    """After an unsafe request, keep the client on the primary for REPLICA_PIN_SECONDS"""
+
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if settings.REPLICA_DATABASE and request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,349 @@
+"""
+Report exports.
+
+Reports are declared at the bottom of this module (REPORTS) as columns,
+filters, grouping and ordering, and each compiles into one queryset. Rows
+are read with values_list().iterator(), so neither model instances nor the
+finished file are ever held in memory: CSV and JSON are streamed as they
+are produced, and XLSX is spooled through a temporary file.
+"""
+import csv
+import tempfile
+import uuid
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Aggregate, Count, FilteredRelation, Max, Min, Q, Sum, TextField, Value
+from django.db.models.expressions import OrderByList
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import InspectionTemplate, Sale, Vehicle, VehicleInspection
+
+try:
+    import openpyxl
+except ImportError:  # XLSX export is optional
+    openpyxl = None
+
+# Rows fetched per database round trip
+CHUNK_SIZE = 2000
+# CSV lines joined into each chunk handed to the server
+LINES_PER_CHUNK = 500
+
+
+class Echo:
+    """Pseudo-file for csv.writer: write() returns the line instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+class GroupConcat(Aggregate):
+    """
+    Values of a group joined by `separator`: GROUP_CONCAT on SQLite,
+    STRING_AGG on PostgreSQL. `order_by` is applied where the database
+    supports ordered aggregates (PostgreSQL, SQLite 3.44+); elsewhere the
+    order follows the join.
+    """
+    function = 'GROUP_CONCAT'
+    template = '%(function)s(%(distinct)s%(expressions)s%(order_by)s)'
+    output_field = TextField()
+
+    def __init__(self, expression, separator=', ', order_by=None, **extra):
+        self.order_by = OrderByList(order_by) if order_by else None
+        super().__init__(expression, Value(separator), **extra)
+
+    def get_source_expressions(self):
+        return super().get_source_expressions() + [self.order_by]
+
+    def set_source_expressions(self, exprs):
+        *exprs, self.order_by = exprs
+        return super().set_source_expressions(exprs)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        order_by_sql, order_by_params = '', []
+        if self.order_by is not None and self.supports_order_by(connection):
+            order_by_sql, order_by_params = compiler.compile(self.order_by)
+            order_by_sql = f' {order_by_sql}'
+        sql, params = super().as_sql(compiler, connection, order_by=order_by_sql, **extra_context)
+        if order_by_params:
+            # ORDER BY sits between the arguments and the FILTER clause
+            filter_params = compiler.compile(self.filter)[1] if self.filter is not None else []
+            head = list(params[:len(params) - len(filter_params)])
+            params = (*head, *order_by_params, *filter_params)
+        return sql, params
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, function='STRING_AGG', **extra_context)
+
+    @staticmethod
+    def supports_order_by(connection):
+        if connection.vendor == 'sqlite':
+            return connection.Database.sqlite_version_info >= (3, 44)
+        return connection.vendor == 'postgresql'
+
+
+def csv_lines(header, rows):
+    """CSV text in chunks of LINES_PER_CHUNK lines, header first"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    lines = []
+    for row in rows:
+        lines.append(writer.writerow(row))
+        if len(lines) >= LINES_PER_CHUNK:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def json_chunks(names, rows):
+    """JSON array of {column name: value} objects, LINES_PER_CHUNK objects per chunk"""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    yield '['
+    items = []
+    first = True
+    for row in rows:
+        items.append(encoder.encode(dict(zip(names, row))))
+        if len(items) >= LINES_PER_CHUNK:
+            yield ('' if first else ',') + ','.join(items)
+            first = False
+            items = []
+    if items:
+        yield ('' if first else ',') + ','.join(items)
+    yield ']'
+
+
+class ReportError(Exception):
+    """Unsupported format or invalid filter value; shown to the user as a 400"""
+
+
+class Column:
+    """Output column: a field path, or the alias of `expression`"""
+
+    def __init__(self, name, label, expression=None):
+        self.name = name
+        self.label = label
+        self.expression = expression
+
+
+class Report:
+    """
+    A report over one model, compiled into a single queryset: relations,
+    then filters (fixed `filters` plus query-string `params`, mapped to
+    lookups), then GROUP BY `group_by` when given, then ORDER BY. Rows come
+    out of one values_list().iterator(), whatever their number.
+    `sources` lists every model whose rows feed the report (default: just
+    `model`); bulk exports are rebuilt when one of them changes.
+    """
+
+    def __init__(self, name, title, model, columns, filters=None, params=None,
+                 relations=None, group_by=None, order_by=(), filename=None, sources=None):
+        self.name = name
+        self.title = title
+        self.model = model
+        self.columns = columns
+        self.filters = filters
+        self.params = params or {}
+        self.relations = relations or {}
+        self.group_by = group_by or []
+        self.order_by = order_by
+        self.filename = filename or name
+        self.sources = sources or [model]
+
+    @property
+    def header(self):
+        return [column.label for column in self.columns]
+
+    @property
+    def names(self):
+        return [column.name for column in self.columns]
+
+    def queryset(self, query=None):
+        queryset = self.model._default_manager.all()
+        if self.relations:
+            # FilteredRelation is mutated by the query it joins: one copy per queryset
+            queryset = queryset.alias(**{name: relation.clone() for name, relation in self.relations.items()})
+        if self.filters is not None:
+            queryset = queryset.filter(self.filters)
+        for param, lookup in self.params.items():
+            value = (query or {}).get(param)
+            if value:
+                try:
+                    queryset = queryset.filter(**{lookup: value})
+                except ValidationError as e:
+                    raise ReportError(f'Valor inválido para {param}: {value}') from e
+        if self.group_by:
+            queryset = queryset.values(*self.group_by)
+        expressions = {column.name: column.expression for column in self.columns if column.expression is not None}
+        if expressions:
+            queryset = queryset.annotate(**expressions)
+        return queryset.order_by(*self.order_by).values_list(*self.names)
+
+    def rows(self, query=None):
+        return self.queryset(query).iterator(chunk_size=CHUNK_SIZE)
+
+
+REPORTS = {}
+
+
+def register(report):
+    REPORTS[report.name] = report
+    return report
+
+
+def _filename(report, extension):
+    return f'{report.filename}_{datetime.now().strftime("%Y%m%d")}.{extension}'
+
+
+def _excel_value(value):
+    # Excel has no UUID type and no time zones
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.make_naive(value)
+    return value
+
+
+def _xlsx_response(report, rows):
+    # Write-only workbooks spool rows to disk instead of keeping cells in memory
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(report.title[:31])
+    sheet.append(report.header)
+    for row in rows:
+        sheet.append([_excel_value(value) for value in row])
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output, as_attachment=True, filename=_filename(report, 'xlsx'),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def export(report, fmt='csv', query=None):
+    """Response with `report` in csv, json or xlsx (xlsx needs openpyxl)"""
+    if fmt == 'xlsx' and openpyxl is None:
+        raise ReportError('Exportação XLSX indisponível: instale o openpyxl')
+    if fmt not in ('csv', 'json', 'xlsx'):
+        raise ReportError(f'Formato não suportado: {fmt}')
+
+    rows = report.rows(query)
+    if fmt == 'xlsx':
+        return _xlsx_response(report, rows)
+    if fmt == 'json':
+        response = StreamingHttpResponse(json_chunks(report.names, rows), content_type='application/json')
+    else:
+        response = StreamingHttpResponse(csv_lines(report.header, rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{_filename(report, fmt)}"'
+    return response
+
+
+register(Report(
+    'inventory', 'Inventário', Vehicle,
+    columns=[
+        Column('year', 'Ano'),
+        Column('make', 'Marca'),
+        Column('model', 'Modelo'),
+        Column('vin', 'VIN'),
+        Column('exterior_color', 'Cor'),
+        Column('miles', 'Milhas'),
+        Column('value', 'Valor'),
+        Column('status', 'Status'),
+        Column('title_status', 'Título'),
+    ],
+    filters=Q(status='DISPONIVEL'),
+    order_by=['-created_at'],
+    filename='inventario',
+))
+
+register(Report(
+    'mechanics', 'Mecânica', Vehicle,
+    columns=[
+        Column('year', 'Ano'),
+        Column('make', 'Marca'),
+        Column('model', 'Modelo'),
+        Column('vin', 'VIN'),
+        # Joined in SQL, not once per vehicle
+        Column('repair_items', 'Itens para Reparar',
+               GroupConcat('repairs__template__item_name', order_by='repairs__template__order')),
+    ],
+    relations={'repairs': FilteredRelation('inspections', condition=Q(inspections__status='SIM'))},
+    filters=Q(status='MECANICA'),
+    sources=[Vehicle, VehicleInspection, InspectionTemplate],
+    # Grouping by the id keeps the GROUP BY to the id and selected columns
+    group_by=['pk'],
+    order_by=['-created_at'],
+    filename='mecanica',
+))
+
+register(Report(
+    'sales', 'Vendas', Sale,
+    columns=[
+        Column('sale_date', 'Data'),
+        Column('vehicle__year', 'Ano'),
+        Column('vehicle__make', 'Marca'),
+        Column('vehicle__model', 'Modelo'),
+        Column('vehicle__vin', 'VIN'),
+        Column('sale_price', 'Preço Venda'),
+        Column('buyer_name', 'Comprador'),
+    ],
+    params={'from': 'sale_date__gte', 'to': 'sale_date__lte'},
+    order_by=['-sale_date'],
+    filename='vendas',
+    sources=[Sale, Vehicle],
+))
+
+register(Report(
+    'vehicles', 'Veículos', Vehicle,
+    columns=[
+        Column('pk', 'ID'),
+        Column('vin', 'VIN'),
+        Column('year', 'Ano'),
+        Column('make', 'Marca'),
+        Column('model', 'Modelo'),
+        Column('trim', 'Versão'),
+        Column('car_type', 'Tipo'),
+        Column('exterior_color', 'Cor'),
+        Column('miles', 'Milhas'),
+        Column('value', 'Valor'),
+        Column('status', 'Status'),
+        Column('title_status', 'Título'),
+        Column('created_at', 'Cadastrado em'),
+        Column('updated_at', 'Atualizado em'),
+    ],
+    order_by=['created_at', 'id'],
+    filename='veiculos',
+))
+
+register(Report(
+    'inventory_by_make', 'Estoque por marca', Vehicle,
+    columns=[
+        Column('make', 'Marca'),
+        Column('title_status', 'Título'),
+        Column('vehicles', 'Veículos', Count('pk')),
+        Column('total_value', 'Valor Total', Sum('value')),
+        Column('min_value', 'Menor Valor', Min('value')),
+        Column('max_value', 'Maior Valor', Max('value')),
+    ],
+    filters=~Q(status='VENDIDO'),
+    params={'status': 'status'},
+    group_by=['make', 'title_status'],
+    order_by=['make', 'title_status'],
+    filename='estoque_por_marca',
+))
+
+register(Report(
+    'repairs_by_item', 'Reparos por item', VehicleInspection,
+    columns=[
+        Column('template__item_name', 'Item'),
+        Column('vehicles', 'Veículos', Count('vehicle', distinct=True)),
+        Column('in_shop', 'Em Mecânica', Count('vehicle', filter=Q(vehicle__status='MECANICA'), distinct=True)),
+    ],
+    filters=Q(status='SIM'),
+    group_by=['template__order', 'template__item_name'],
+    order_by=['template__order', 'template__item_name'],
+    filename='reparos_por_item',
+    sources=[VehicleInspection, InspectionTemplate, Vehicle],
+))
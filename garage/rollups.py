@@ -0,0 +1,131 @@
+"""
+Daily sales rollups.
+
+DailySalesRollup holds one row per (sale day, make, car type) with the
+number of sales, revenue, margin (sale_price - vehicle.value) and days on
+the lot (sale_date - vehicle.created_at). The Sale signals apply each sale
+as it is saved or deleted; rebuild() recomputes the whole table and is what
+the rebuild_sales_rollups command and the migration run.
+
+Figures use the vehicle as it is when the sale is written: later edits to a
+sold vehicle's make, type or value only show up after a rebuild.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+
+def figures(sale_date, sale_price, make, car_type, value, created_at):
+    """(key, increments) of one sale"""
+    days_on_lot = (sale_date - timezone.localtime(created_at).date()).days
+    increments = {
+        'sales': 1,
+        'revenue': sale_price,
+        'margin': sale_price - value,
+        # A sale dated before the vehicle was registered counts as same-day
+        'days_on_lot': max(days_on_lot, 0),
+    }
+    return (sale_date, make, car_type), increments
+
+
+def sale_figures(sale):
+    """Figures of a Sale instance; its fields may still hold form strings"""
+    meta = type(sale)._meta
+    vehicle = sale.vehicle
+    return figures(
+        meta.get_field('sale_date').to_python(sale.sale_date),
+        meta.get_field('sale_price').to_python(sale.sale_price),
+        vehicle.make, vehicle.car_type, vehicle.value, vehicle.created_at,
+    )
+
+
+def apply(rollup_model, entry, sign=1):
+    """Add (sign=1) or remove (sign=-1) one sale from its rollup row"""
+    (day, make, car_type), increments = entry
+    key = {'day': day, 'make': make, 'car_type': car_type}
+    changes = {name: F(name) + sign * amount for name, amount in increments.items()}
+    with transaction.atomic():
+        if rollup_model.objects.filter(**key).update(**changes):
+            if sign < 0:
+                # Last sale of the row gone: drop it rather than keep zeros
+                rollup_model.objects.filter(**key, sales__lte=0).delete()
+            return
+        if sign < 0:
+            # Nothing to remove from: the table is already out of step
+            return
+        try:
+            with transaction.atomic():
+                rollup_model.objects.create(**key, **increments)
+        except IntegrityError:
+            # Created by a concurrent sale since the update above
+            rollup_model.objects.filter(**key).update(**changes)
+
+
+def rebuild(sale_model, rollup_model, using='default'):
+    """Recompute every rollup row from the sales table; returns the row count"""
+    totals = {}
+    rows = (
+        sale_model.objects.using(using)
+        .values_list(
+            'sale_date', 'sale_price', 'vehicle__make', 'vehicle__car_type',
+            'vehicle__value', 'vehicle__created_at',
+        )
+        .order_by()
+        .iterator(chunk_size=2000)
+    )
+    for row in rows:
+        key, increments = figures(*row)
+        total = totals.setdefault(key, {'sales': 0, 'revenue': Decimal(0), 'margin': Decimal(0), 'days_on_lot': 0})
+        for name, amount in increments.items():
+            total[name] += amount
+
+    with transaction.atomic(using=using):
+        rollup_model.objects.using(using).all().delete()
+        rollup_model.objects.using(using).bulk_create(
+            [
+                rollup_model(day=day, make=make, car_type=car_type, **total)
+                for (day, make, car_type), total in totals.items()
+            ],
+            batch_size=1000,
+        )
+    return len(totals)
+
+
+def _summary(row):
+    sales = row['sales'] or 0
+    return {
+        **row,
+        'avg_margin': row['margin'] / sales if sales else None,
+        'avg_days_on_lot': round(row['days_on_lot'] / sales, 1) if sales else None,
+    }
+
+
+def sales_analytics(rollup_model, start, end):
+    """
+    Daily series and make/car type breakdowns for start..end (inclusive),
+    read from the rollups: the cost follows the days and groups in the
+    range, not the number of sales.
+    """
+    rows = rollup_model.objects.filter(day__range=(start, end))
+    sums = {
+        'sales': Sum('sales'), 'revenue': Sum('revenue'),
+        'margin': Sum('margin'), 'days_on_lot': Sum('days_on_lot'),
+    }
+
+    by_day = {row['day']: row for row in rows.values('day').annotate(**sums).order_by()}
+    days = []
+    day = start
+    while day <= end:
+        days.append(by_day.get(day, {'day': day, 'sales': 0, 'revenue': Decimal(0), 'margin': Decimal(0)}))
+        day += timedelta(days=1)
+
+    totals = rows.aggregate(**sums)
+    return {
+        'days': days,
+        'by_make': [_summary(row) for row in rows.values('make').annotate(**sums).order_by('-sales', 'make')],
+        'by_car_type': [_summary(row) for row in rows.values('car_type').annotate(**sums).order_by('-sales', 'car_type')],
+        'totals': _summary({name: value or 0 for name, value in totals.items()}),
+    }
@@ -0,0 +1,211 @@
+import re
+
+from django.conf import settings
+from django.db import connections, models
+from django.db.models import F, Lookup
+from django.db.models.functions import Upper
+from django.db.models.sql.constants import INNER
+from django.db.models.sql.datastructures import Join
+
+# Vehicle columns covered by the search index, in FTS column order
+SEARCH_FIELDS = ['make', 'model', 'vin', 'trim', 'engine', 'exterior_color']
+
+# bm25 weights per FTS column (vehicle_id first, unindexed)
+SEARCH_WEIGHTS = [0, 10, 10, 5, 2, 1, 1]
+
+FTS_TABLE = 'garage_vehicle_fts'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class SearchDocumentField(models.TextField):
+    """
+    FTS5 hidden column that carries the table name.
+    MATCH against it searches every indexed column at once.
+    """
+
+
+@SearchDocumentField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+def search_tokens(value):
+    return TOKEN_RE.findall(value or '')
+
+
+def fts_query(value):
+    """'honda civ' -> '"honda"* "civ"*' (every token, prefix match)"""
+    return ' '.join('"%s"*' % token.replace('"', '""') for token in search_tokens(value))
+
+
+def search_vehicles(queryset, value):
+    """
+    Filter a Vehicle queryset by the search index.
+    Matching rows get a `search_rank` annotation (lower is more relevant).
+    On SQLite only the SEARCH_MAX_RESULTS most relevant matches are kept.
+    """
+    if not search_tokens(value):
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return _search_postgres(queryset, value)
+    if vendor == 'sqlite':
+        return _search_sqlite(queryset, value)
+    return _search_fallback(queryset, value)
+
+
+class TopMatches(Join):
+    """
+    Join to the SEARCH_MAX_RESULTS best-ranked FTS matches instead of the
+    whole FTS table. FTS5 still scores every match, but the vehicle lookups,
+    the sort and the count stop growing with the number of matches.
+    """
+
+    match = None
+    limit = None
+
+    def as_sql(self, compiler, connection):
+        sql, params = super().as_sql(compiler, connection)
+        qn = compiler.quote_name_unless_alias
+        table = qn(self.table_name)
+        return (
+            f'{self.join_type} (SELECT vehicle_id, rank FROM {table} WHERE {table} MATCH %s '
+            f'ORDER BY rank LIMIT %s) {qn(self.table_alias)} ON {sql.partition(" ON ")[2]}',
+            [self.match, self.limit, *params],
+        )
+
+    def relabeled_clone(self, change_map):
+        new = super().relabeled_clone(change_map)
+        new.match, new.limit = self.match, self.limit
+        return new
+
+
+def _search_sqlite(queryset, value):
+    queryset = queryset.annotate(search_rank=F('search_index__rank'))
+    query = queryset.query
+    alias = query.annotations['search_rank'].alias
+    join = query.alias_map[alias]
+    top = TopMatches(join.table_name, join.parent_alias, alias, INNER, join.join_field, join.nullable)
+    top.match, top.limit = fts_query(value), settings.SEARCH_MAX_RESULTS
+    query.alias_map[alias] = top
+    return queryset
+
+
+def search_vector():
+    """tsvector expression shared by the Postgres GIN index and the query"""
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector(*SEARCH_FIELDS, config='simple')
+
+
+def _search_postgres(queryset, value):
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+
+    query = SearchQuery(
+        ' & '.join(f"{token}:*" for token in search_tokens(value)),
+        search_type='raw',
+        config='simple',
+    )
+    vector = search_vector()
+    # VIN fragments (e.g. the last 6 digits) are substrings, not token
+    # prefixes; the trigram index on UPPER(vin) serves that LIKE.
+    return queryset.annotate(search_document=vector).alias(vin_upper=Upper('vin')).filter(
+        models.Q(search_document=query) | models.Q(vin_upper__contains=value.strip().upper())
+    ).annotate(search_rank=-SearchRank(vector, query))
+
+
+def _search_fallback(queryset, value):
+    condition = models.Q()
+    for token in search_tokens(value):
+        token_condition = models.Q()
+        for field in SEARCH_FIELDS:
+            token_condition |= models.Q(**{f'{field}__icontains': token})
+        condition &= token_condition
+    return queryset.filter(condition).annotate(search_rank=models.Value(0.0))
+
+
+# --- SQLite FTS5 schema -------------------------------------------------------
+
+_FTS_COLUMNS = ', '.join(['vehicle_id'] + SEARCH_FIELDS)
+_FTS_NEW_VALUES = ', '.join(['new.rowid', 'new.id'] + [f'new.{field}' for field in SEARCH_FIELDS])
+_FTS_CHANGED = ' OR '.join(f'old.{field} IS NOT new.{field}' for field in SEARCH_FIELDS)
+
+FTS_CREATE_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        vehicle_id UNINDEXED, {', '.join(SEARCH_FIELDS)},
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25({', '.join(map(str, SEARCH_WEIGHTS))})')",
+]
+
+# FTS rows share the vehicle's rowid so trigger maintenance is a rowid
+# lookup; vehicle_id is stored as well and is what searches join on.
+FTS_TRIGGERS_SQL = [
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON garage_vehicle BEGIN
+        INSERT OR REPLACE INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES ({_FTS_NEW_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON garage_vehicle BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.rowid;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF {', '.join(SEARCH_FIELDS)} ON garage_vehicle
+        WHEN {_FTS_CHANGED} BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.rowid;
+        INSERT OR REPLACE INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES ({_FTS_NEW_VALUES});
+    END""",
+]
+
+FTS_REBUILD_SQL = [
+    f"DELETE FROM {FTS_TABLE}",
+    f"INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) SELECT rowid, id, {', '.join(SEARCH_FIELDS)} FROM garage_vehicle",
+]
+
+
+def postgres_search_indexes():
+    from django.contrib.postgres.indexes import GinIndex, OpClass
+    return [
+        GinIndex(search_vector(), name='vehicle_search_vector_gin'),
+        GinIndex(OpClass(Upper('vin'), name='gin_trgm_ops'), name='vehicle_vin_trgm_gin'),
+    ]
+
+
+def fts_triggers_missing(cursor):
+    cursor.execute(
+        "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+        [f'{FTS_TABLE}_a%'],
+    )
+    return cursor.fetchone()[0] < len(FTS_TRIGGERS_SQL)
+
+
+def rebuild_search_index(using='default'):
+    """Recreate missing triggers and reload every vehicle into the index"""
+    from django.db import connections, transaction
+
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return False
+    with transaction.atomic(using=using), db.cursor() as cursor:
+        for sql in FTS_CREATE_SQL + FTS_TRIGGERS_SQL + FTS_REBUILD_SQL:
+            cursor.execute(sql)
+    return True
+
+
+def ensure_search_triggers(using='default', **kwargs):
+    """
+    post_migrate hook. SQLite ALTERs rebuild garage_vehicle, which drops its
+    triggers and renumbers rowids; put both back when that happened.
+    """
+    from django.db import connections
+
+    db = connections[using]
+    if db.vendor != 'sqlite' or FTS_TABLE not in db.introspection.table_names():
+        return
+    with db.cursor() as cursor:
+        if fts_triggers_missing(cursor):
+            rebuild_search_index(using)
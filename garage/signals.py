@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Vehicle, InspectionTemplate, VehicleInspection, Sale, DailySalesRollup
+from .dashboard import invalidate_dashboard
+from . import rollups
+
+
+def _origin_model(origin):
+    """Model class that started a delete (origin is an instance or a queryset)"""
+    if isinstance(origin, QuerySet):
+        return origin.model
+    return type(origin)
+
+
+@receiver(post_save, sender=VehicleInspection)
+def inspection_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    Vehicle.refresh_inspection_counters([instance.vehicle_id])
+
+
+@receiver(post_delete, sender=VehicleInspection)
+def inspection_deleted(sender, instance, origin=None, **kwargs):
+    # Cascades from a vehicle (row is going away) or a template (recounted
+    # once for the whole fleet below) don't need a per-row refresh.
+    if _origin_model(origin) in (Vehicle, InspectionTemplate):
+        return
+    Vehicle.refresh_inspection_counters([instance.vehicle_id])
+
+
+@receiver(post_save, sender=InspectionTemplate)
+def template_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Vehicle.objects.update(inspection_total=F('inspection_total') + 1)
+
+
+@receiver(post_delete, sender=InspectionTemplate)
+def template_deleted(sender, instance, **kwargs):
+    Vehicle.refresh_inspection_counters()
+
+
+@receiver(pre_save, sender=Sale)
+def sale_saving(sender, instance, raw=False, **kwargs):
+    # An edited sale leaves its old figures behind: remember them
+    instance._rollup_previous = None
+    if raw or instance._state.adding:
+        return
+    previous = Sale.objects.select_related('vehicle').filter(pk=instance.pk).first()
+    if previous is not None:
+        instance._rollup_previous = rollups.sale_figures(previous)
+
+
+@receiver(post_save, sender=Sale)
+def sale_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    with transaction.atomic():
+        previous = getattr(instance, '_rollup_previous', None)
+        if previous is not None:
+            rollups.apply(DailySalesRollup, previous, sign=-1)
+        rollups.apply(DailySalesRollup, rollups.sale_figures(instance))
+
+
+@receiver(post_delete, sender=Sale)
+def sale_deleted(sender, instance, **kwargs):
+    rollups.apply(DailySalesRollup, rollups.sale_figures(instance), sign=-1)
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+@receiver(post_save, sender=VehicleInspection)
+@receiver(post_delete, sender=VehicleInspection)
+@receiver(post_save, sender=InspectionTemplate)
+@receiver(post_delete, sender=InspectionTemplate)
+@receiver(post_save, sender=Sale)
+@receiver(post_delete, sender=Sale)
+def dashboard_data_changed(sender, **kwargs):
+    invalidate_dashboard()
@@ -0,0 +1,310 @@
+"""
+Photo storage and the background Cloudinary upload queue.
+
+photo_upload only stages files on disk and queues a PhotoUpload; the
+photo_worker command builds their resized copies and sends them with a
+bounded thread pool. Threads only do file and network work - every database
+write happens on the worker's main thread.
+"""
+import hashlib
+import logging
+import os
+import random
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from pathlib import Path
+
+import cloudinary.uploader
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .derivatives import build_derivatives, delete_derivatives, media_url
+from .models import Photo, PhotoUpload
+
+logger = logging.getLogger(__name__)
+
+# One folder for every vehicle: the public id is the content hash, so the
+# same bytes are a single asset whichever vehicles show them
+PHOTO_FOLDER = "kario_garage/photos"
+
+
+def local_images_dir():
+    """media/images/ under MEDIA_ROOT"""
+    return Path(settings.MEDIA_ROOT) / "images"
+
+
+def ensure_local_images_dir():
+    """Ensure local images directory exists"""
+    try:
+        local_images_dir().mkdir(parents=True, exist_ok=True)
+        return True
+    except Exception as e:
+        logger.warning('Error creating local images directory: %s', e)
+        return False
+
+
+def blob_path(content_hash, extension):
+    """media/images/<first 2 hex digits>/<sha256><ext>"""
+    return local_images_dir() / content_hash[:2] / f"{content_hash}{extension.lower()}"
+
+
+def save_image_locally(file, filename):
+    """
+    Save image to local directory media/images/, named by its SHA-256 so
+    identical files share one blob. The hash is computed while the chunks
+    are written.
+    Returns (local file path, content hash) or None if failed
+    """
+    try:
+        # Ensure directory exists
+        if not ensure_local_images_dir():
+            return None
+
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=local_images_dir(), suffix='.part', delete=False) as destination:
+            try:
+                for chunk in file.chunks():
+                    digest.update(chunk)
+                    destination.write(chunk)
+            except BaseException:
+                destination.close()
+                os.remove(destination.name)
+                raise
+
+        content_hash = digest.hexdigest()
+        file_path = blob_path(content_hash, os.path.splitext(filename)[1])
+        file_path.parent.mkdir(exist_ok=True)
+        # Atomic; replacing an existing blob is harmless since the bytes are
+        # the same, and restores one removed by a concurrent delete
+        os.replace(destination.name, file_path)
+        return str(file_path), content_hash
+    except Exception as e:
+        logger.warning('Error saving file locally: %s', e)
+        return None
+
+
+def delete_local_image(file_path):
+    """Delete image from local storage, unless another photo still uses the blob"""
+    if not file_path or Photo.objects.filter(google_drive_id=file_path).exists():
+        return False
+    try:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+            return True
+    except Exception as e:
+        logger.warning('Error deleting local file %s: %s', file_path, e)
+    return False
+
+
+def release_derivatives(content_hash, storage_key):
+    """Delete the derivatives under `storage_key` once no photo with the same hash is left"""
+    if content_hash and Photo.objects.filter(content_hash=content_hash).exists():
+        return False
+    delete_derivatives(storage_key)
+    return True
+
+
+def release_cloudinary_asset(public_id):
+    """Destroy a Cloudinary asset once no photo refers to it (errors propagate)"""
+    if not public_id or Photo.objects.filter(cloudinary_public_id=public_id).exists():
+        return False
+    cloudinary.uploader.destroy(public_id)
+    return True
+
+
+def delete_photo(photo):
+    """
+    Delete a Photo, then the local blob, derivatives and Cloudinary asset
+    that no remaining photo shares. Cloudinary errors are raised after the
+    row and the local files are gone.
+    """
+    storage_key = photo.storage_key
+    photo.delete()
+    delete_local_image(photo.google_drive_id)
+    release_derivatives(photo.content_hash, storage_key)
+    release_cloudinary_asset(photo.cloudinary_public_id)
+
+
+def uploaded_copies(content_hashes):
+    """{content hash: Photo already on Cloudinary} for the given hashes"""
+    copies = Photo.objects.filter(content_hash__in=content_hashes, cloudinary_public_id__gt='').order_by('uploaded_at')
+    found = {}
+    for photo in copies.only('content_hash', 'image_url', 'cloudinary_public_id', 'derivatives'):
+        found.setdefault(photo.content_hash, photo)
+    return found
+
+
+def stage_photo(file, vehicle, description='', user=None):
+    """
+    Write an uploaded file to disk and queue it for Cloudinary. A file whose
+    bytes are already on Cloudinary reuses that asset and isn't queued.
+    Returns the new Photo, or None if the file couldn't be saved.
+    """
+    stored = save_image_locally(file, file.name)
+    if not stored:
+        return None
+    local_path, content_hash = stored
+    copy = uploaded_copies([content_hash]).get(content_hash)
+
+    with transaction.atomic():
+        photo = Photo.objects.create(
+            vehicle=vehicle,
+            # Served from disk until Cloudinary has it
+            image_url=copy.image_url if copy else media_url(local_path),
+            cloudinary_public_id=copy.cloudinary_public_id if copy else None,
+            derivatives=copy.derivatives if copy else {},
+            content_hash=content_hash,
+            google_drive_id=local_path,  # Storing local path in this field now
+            description=description,
+            uploaded_by=user,
+        )
+        if copy is None:
+            PhotoUpload.objects.create(
+                photo=photo,
+                local_path=local_path,
+                folder=PHOTO_FOLDER,
+            )
+    return photo
+
+
+# --- Worker -------------------------------------------------------------------
+
+def _due():
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.PHOTO_UPLOAD_LEASE)
+    # Entries claimed by a worker that died mid-upload become due again
+    return Q(status='PENDENTE', next_attempt_at__lte=now) | Q(status='ENVIANDO', claimed_at__lt=stale)
+
+
+def claim_uploads(limit):
+    """
+    Claim up to `limit` due entries. Each claim is a conditional UPDATE, so
+    concurrent workers never send the same photo twice.
+    """
+    due = _due()
+    candidates = list(
+        PhotoUpload.objects.filter(due).order_by('next_attempt_at').values_list('pk', flat=True)[:limit]
+    )
+    now = timezone.now()
+    claimed = [
+        pk for pk in candidates
+        if PhotoUpload.objects.filter(due, pk=pk).update(status='ENVIANDO', claimed_at=now)
+    ]
+    return list(PhotoUpload.objects.filter(pk__in=claimed).select_related('photo').order_by('next_attempt_at'))
+
+
+def upload_file(local_path, folder, content_hash=''):
+    options = {'folder': folder, 'resource_type': 'auto'}
+    if content_hash:
+        # Racing uploads of the same bytes end up on one asset
+        options.update(public_id=content_hash, overwrite=False)
+    if settings.CLOUDINARY_UPLOAD_PREFIX:
+        options['upload_prefix'] = settings.CLOUDINARY_UPLOAD_PREFIX
+    return cloudinary.uploader.upload(local_path, **options)
+
+
+def transfer(job):
+    """
+    Runs in a pool thread, without database access: builds the derivatives
+    if the photo has none yet, then uploads the original.
+    Returns (upload result or None, upload error or None, derivatives or None).
+    """
+    derivatives = None
+    if not job.photo.derivatives:
+        try:
+            derivatives = build_derivatives(job.local_path, job.photo.storage_key)
+        except Exception as e:
+            logger.warning('Could not resize photo %s: %s', job.photo_id, e)
+    try:
+        return upload_file(job.local_path, job.folder, job.photo.content_hash), None, derivatives
+    except Exception as e:
+        return None, e, derivatives
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter: ~base, 2*base, 4*base... capped"""
+    delay = min(settings.PHOTO_UPLOAD_RETRY_BASE * 2 ** (attempts - 1), settings.PHOTO_UPLOAD_RETRY_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def save_derivatives(job, derivatives):
+    if derivatives and not Photo.objects.filter(pk=job.photo_id).update(derivatives=derivatives):
+        release_derivatives(job.photo.content_hash, job.photo.storage_key)
+
+
+def finish_upload(job, result, derivatives=None):
+    fields = {'image_url': result['secure_url'], 'cloudinary_public_id': result['public_id']}
+    if derivatives:
+        fields['derivatives'] = derivatives
+    with transaction.atomic():
+        updated = Photo.objects.filter(pk=job.photo_id).update(**fields)
+        PhotoUpload.objects.filter(pk=job.pk).update(
+            status='CONCLUIDO', finished_at=timezone.now(), last_error='',
+        )
+    if not updated:
+        # Photo was deleted while its upload was in flight
+        release_derivatives(job.photo.content_hash, job.photo.storage_key)
+        try:
+            release_cloudinary_asset(result['public_id'])
+        except Exception as e:
+            logger.warning('Could not remove orphaned upload %s: %s', result['public_id'], e)
+
+
+def fail_upload(job, error, derivatives=None):
+    save_derivatives(job, derivatives)
+    attempts = job.attempts + 1
+    fields = {'attempts': attempts, 'last_error': str(error)[:2000], 'claimed_at': None}
+    if attempts >= settings.PHOTO_UPLOAD_MAX_ATTEMPTS:
+        fields.update(status='FALHOU', finished_at=timezone.now())
+    else:
+        fields.update(status='PENDENTE', next_attempt_at=timezone.now() + timedelta(seconds=retry_delay(attempts)))
+    PhotoUpload.objects.filter(pk=job.pk).update(**fields)
+    return fields['status']
+
+
+def process_uploads(max_workers=None, limit=None):
+    """
+    One worker pass: claim due entries, upload them concurrently and record
+    each result as it completes. Entries whose bytes are already on
+    Cloudinary reuse that asset, and identical files in the same pass are
+    sent once. Returns (uploaded, failed) counts.
+    """
+    max_workers = max_workers or settings.PHOTO_UPLOAD_WORKERS
+    jobs = claim_uploads(limit or max_workers * 4)
+    uploaded = failed = 0
+    if not jobs:
+        return uploaded, failed
+
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job.photo.content_hash or job.pk, []).append(job)
+    copies = uploaded_copies([key for key in groups if isinstance(key, str)])
+
+    pending = []
+    for key, group in groups.items():
+        copy = copies.get(key)
+        if copy is None:
+            pending.append(group)
+            continue
+        result = {'secure_url': copy.image_url, 'public_id': copy.cloudinary_public_id}
+        for job in group:
+            finish_upload(job, result, copy.derivatives)
+            uploaded += 1
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='photo-upload') as pool:
+        futures = {pool.submit(transfer, group[0]): group for group in pending}
+        for future in as_completed(futures):
+            group = futures[future]
+            result, error, derivatives = future.result()
+            for job in group:
+                if error is not None:
+                    logger.warning('Upload of photo %s failed: %s', job.photo_id, error)
+                    fail_upload(job, error, derivatives)
+                    failed += 1
+                else:
+                    finish_upload(job, result, derivatives)
+                    uploaded += 1
+    return uploaded, failed
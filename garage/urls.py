@@ -4,6 +4,9 @@ from . import views
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('analytics/', views.sales_analytics, name='sales_analytics'),
+    path('analytics/aging/', views.inventory_aging, name='inventory_aging'),
+    path('api/aging/', views.inventory_aging_api, name='inventory_aging_api'),
     path('vehicles/', views.vehicle_list, name='vehicle_list'),
     path('vehicles/add/', views.vehicle_add, name='vehicle_add'),
     path('vehicles/decode/', views.decode_vin, name='decode_vin'),
@@ -13,7 +16,9 @@ urlpatterns = [
     path('vehicles/<uuid:pk>/inspection/', views.inspection_update, name='inspection_update'),
     path('vehicles/<uuid:pk>/photos/', views.photo_upload, name='photo_upload'),
     path('photos/<uuid:pk>/delete/', views.photo_delete, name='photo_delete'),
-    path('reports/inventory/', views.report_inventory, name='report_inventory'),
-    path('reports/mechanics/', views.report_mechanics, name='report_mechanics'),
-    path('reports/sales/', views.report_sales, name='report_sales'),
+    path('reports/inventory/', views.report_export, {'name': 'inventory'}, name='report_inventory'),
+    path('reports/mechanics/', views.report_export, {'name': 'mechanics'}, name='report_mechanics'),
+    path('reports/sales/', views.report_export, {'name': 'sales'}, name='report_sales'),
+    path('reports/<slug:name>/', views.report_export, name='report_export'),
+    path('reports/<slug:name>/bulk/', views.report_bulk, name='report_bulk'),
 ]
\ No newline at end of file
@@ -1,32 +1,40 @@
+import hashlib
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models.functions import TruncMonth
 from django.contrib.auth import login, logout, authenticate
 from django.contrib import messages
-from django.db.models import Count, Q
-from django.http import HttpResponse
-from datetime import datetime
-import requests
-import csv
-import cloudinary.uploader
-from .models import Vehicle, InspectionTemplate, VehicleInspection, Photo, Sale
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import FileResponse, Http404, HttpResponseBadRequest, JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from asgiref.sync import sync_to_async
+from .models import Vehicle, VehicleInspection, Photo, Sale, DailySalesRollup
 from .filters import VehicleFilter
-import os
-from pathlib import Path
-import shutil
-
-# Local storage setup
-BASE_DIR = Path(__file__).resolve().parent.parent
-LOCAL_IMAGES_DIR = BASE_DIR / "media" / "images"
-
-def ensure_local_images_dir():
-    """Ensure local images directory exists"""
-    try:
-        LOCAL_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
-        return True
-    except Exception as e:
-        print(f"Error creating local images directory: {e}")
-        return False
+from .dashboard import get_dashboard_snapshot
+from .pagination import KeysetPaginator
+from .vin import VinDecodeError, avehicle_data_from_vin
+from .vin_offline import is_valid_vin
+from .uploads import delete_photo, stage_photo
+from .aging import get_aging
+from .replicas import use_replica
+from . import bulk_export, reports, rollups
+
+SORT_CHOICES = [
+    ('-created', 'Mais recentes'),
+    ('created', 'Mais antigos'),
+    ('price', 'Menor preço'),
+    ('-price', 'Maior preço'),
+    ('miles', 'Menos milhas'),
+    ('-miles', 'Mais milhas'),
+    ('-year', 'Ano mais novo'),
+    ('year', 'Ano mais antigo'),
+]
 
 def is_staff_user(user):
     """Check if user is staff (admin) to allow modifications"""
@@ -49,51 +57,79 @@ def logout_view(request):
 
 @login_required
 def dashboard(request):
-    totals = Vehicle.objects.aggregate(
-        disponivel=Count('id', filter=Q(status='DISPONIVEL')),
-        vendido=Count('id', filter=Q(status='VENDIDO')),
-        mecanica=Count('id', filter=Q(status='MECANICA')),
-        falta_inspecao=Count('id', filter=Q(status='FALTA_INSPECAO')),
-        limpo=Count('id', filter=Q(title_status='LIMPO')),
-        nao_limpo=Count('id', filter=~Q(title_status='LIMPO'))
-    )
-    
-    vehicles = Vehicle.objects.all()
-    fichas_completas = 0
-    fichas_incompletas = 0
-    
-    for vehicle in vehicles:
-        if vehicle.is_inspection_complete():
-            fichas_completas += 1
-        else:
-            fichas_incompletas += 1
-    
-    sales_by_month = Sale.objects.annotate(
+    return render(request, 'dashboard.html', get_dashboard_snapshot())
 
-        month=TruncMonth('sale_date')
+def _date_param(value, default):
+    try:
+        return date.fromisoformat(value) if value else default
+    except ValueError:
+        return default
 
-    ).values('month').annotate(total=Count('id')).order_by('month')
+@login_required
+@use_replica
+def sales_analytics(request):
+    end = _date_param(request.GET.get('to'), timezone.localdate())
+    start = _date_param(request.GET.get('from'), end - timedelta(days=settings.ANALYTICS_DEFAULT_DAYS - 1))
+    if start > end:
+        start, end = end, start
+
+    context = rollups.sales_analytics(DailySalesRollup, start, end)
+    car_types = dict(Vehicle.CAR_TYPE_CHOICES)
+    for row in context['by_car_type']:
+        row['label'] = car_types.get(row['car_type'], row['car_type'])
+    context.update({
+        'start': start,
+        'end': end,
+        'chart_labels': [row['day'].isoformat() for row in context['days']],
+        'chart_sales': [row['sales'] for row in context['days']],
+        'chart_revenue': [float(row['revenue']) for row in context['days']],
+    })
+    return render(request, 'analytics.html', context)
 
- 
+@login_required
+def inventory_aging(request):
+    return render(request, 'aging.html', {'aging': get_aging()})
 
-    # Formatar labels no formato YYYY-MM
+@login_required
+def inventory_aging_api(request):
+    return JsonResponse(get_aging())
 
-    chart_labels = [s['month'].strftime('%Y-%m') if s['month'] else '' for s in sales_by_month]
-    chart_data = [s['total'] for s in sales_by_month]
-    
-    context = {
-        'totals': totals,
-        'fichas_completas': fichas_completas,
-        'fichas_incompletas': fichas_incompletas,
-        'chart_labels': chart_labels,
-        'chart_data': chart_data,
-    }
-    return render(request, 'dashboard.html', context)
+def _filtered_count(queryset, params):
+    """
+    COUNT of the filtered list, cached per filter for a short while: an exact
+    count on every page would scan the whole match again, the cost keyset
+    pagination avoids.
+    """
+    filters = sorted((key, values) for key, values in params.lists() if key != 'sort')
+    key = 'garage:vehicle_count:' + hashlib.sha256(urlencode(filters, doseq=True).encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.VEHICLE_COUNT_CACHE_TIMEOUT)
+    return count
 
 @login_required
+@use_replica
 def vehicle_list(request):
     # Use django-filter for comprehensive filtering
     vehicle_filter = VehicleFilter(request.GET, queryset=Vehicle.objects.all())
+    # Searches default to relevance order unless a sort was picked
+    sort = request.GET.get('sort') or ('relevance' if request.GET.get('search') else None)
+    # One query for the cover photos of the whole page
+    cover_photos = Prefetch(
+        'photos', queryset=Photo.objects.order_by('uploaded_at', 'id')[:1], to_attr='cover_photos',
+    )
+    paginator = KeysetPaginator(
+        vehicle_filter.qs.prefetch_related(cover_photos),
+        sort=sort,
+        per_page=settings.VEHICLE_LIST_PAGE_SIZE,
+    )
+    page = paginator.page(after=request.GET.get('after'), before=request.GET.get('before'))
+
+    # Keep filters and sort in the page links, drop the old cursor
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
 
     # Get distinct values for dropdowns
     makes = Vehicle.objects.values_list('make', flat=True).distinct().order_by('make')
@@ -102,45 +138,40 @@ def vehicle_list(request):
 
     return render(request, 'vehicle_list.html', {
         'filter': vehicle_filter,
-        'vehicles': vehicle_filter.qs,
+        'vehicles': page.object_list,
+        'page': page,
+        'sort': paginator.sort,
+        'sort_choices': SORT_CHOICES + ([('relevance', 'Relevância')] if request.GET.get('search') else []),
+        'total_count': _filtered_count(vehicle_filter.qs, params),
+        'page_query': params.urlencode(),
         'makes': makes,
         'years': years,
         'car_types': car_types,
     })
 
 @login_required
-def decode_vin(request):
+async def decode_vin(request):
+    # Async so a slow vPIC response doesn't hold a worker under ASGI
+    arender = sync_to_async(render)
     if request.method == 'POST':
         vin = request.POST.get('vin', '').strip()
         year = request.POST.get('year', '')
         
         if len(vin) != 17:
-            return render(request, 'decode_vin.html', {'error': 'VIN deve ter 17 caracteres'})
-        
-        url = f"https://vpic.nhtsa.dot.gov/api/vehicles/DecodeVin/{vin}?format=json&modelyear={year}"
+            return await arender(request, 'decode_vin.html', {'error': 'VIN deve ter 17 caracteres'})
         
         try:
-            response = requests.get(url, timeout=10)
-            data = response.json()
-            results = {item['Variable']: item['Value'] for item in data.get('Results', [])}
-            
-            vehicle_data = {
-                'vin': vin,
-                'year': results.get('Model Year', year),
-                'make': results.get('Make', ''),
-                'model': results.get('Model', ''),
-                'trim': results.get('Trim', ''),
-                'engine': results.get('Engine Model', ''),
-                'transmission': results.get('Transmission Style', ''),
-            }
-            
-            request.session['vehicle_data'] = vehicle_data
-            return redirect('vehicle_add')
-            
-        except Exception as e:
-            return render(request, 'decode_vin.html', {'error': f'Erro ao consultar VIN: {str(e)}'})
+            vehicle_data = await avehicle_data_from_vin(vin, year)
+        except VinDecodeError as e:
+            return await arender(request, 'decode_vin.html', {'error': f'Erro ao consultar VIN: {str(e)}'})
+
+        if not is_valid_vin(vehicle_data['vin']):
+            messages.warning(request, 'Dígito verificador do VIN não confere. Confira a digitação.')
+
+        await request.session.aset('vehicle_data', vehicle_data)
+        return redirect('vehicle_add')
     
-    return render(request, 'decode_vin.html')
+    return await arender(request, 'decode_vin.html')
 
 @login_required
 @user_passes_test(is_staff_user, login_url='/dashboard/')
@@ -170,9 +201,6 @@ def vehicle_add(request):
             updated_by=request.user
         )
 
-        for template in InspectionTemplate.objects.all():
-            VehicleInspection.objects.create(vehicle=vehicle, template=template)
-
         if 'vehicle_data' in request.session:
             del request.session['vehicle_data']
 
@@ -251,7 +279,7 @@ def calculate_utah_financing(vehicle_value):
 @login_required
 def vehicle_detail(request, pk):
     vehicle = get_object_or_404(Vehicle, pk=pk)
-    inspections = vehicle.inspections.select_related('template').order_by('template__order')
+    inspections = vehicle.inspection_checklist()
     photos = vehicle.photos.all()
 
     # Calculate financing for Utah
@@ -270,15 +298,17 @@ def vehicle_sell(request, pk):
     vehicle = get_object_or_404(Vehicle, pk=pk)
     
     if request.method == 'POST':
-        Sale.objects.create(
-            vehicle=vehicle,
-            sale_price=request.POST.get('sale_price'),
-            sale_date=request.POST.get('sale_date'),
-            buyer_name=request.POST.get('buyer_name', ''),
-            notes=request.POST.get('notes', '')
-        )
-        vehicle.status = 'VENDIDO'
-        vehicle.save()
+        # The sale, its rollup and the status change land together
+        with transaction.atomic():
+            Sale.objects.create(
+                vehicle=vehicle,
+                sale_price=request.POST.get('sale_price'),
+                sale_date=request.POST.get('sale_date'),
+                buyer_name=request.POST.get('buyer_name', ''),
+                notes=request.POST.get('notes', '')
+            )
+            vehicle.status = 'VENDIDO'
+            vehicle.save()
         messages.success(request, 'Veículo vendido com sucesso!')
         return redirect('vehicle_list')
     
@@ -289,71 +319,66 @@ def inspection_update(request, pk):
     vehicle = get_object_or_404(Vehicle, pk=pk)
     
     if request.method == 'POST':
-        for key, value in request.POST.items():
-            if key.startswith('status_'):
-                inspection_id = key.replace('status_', '')
-                inspection = VehicleInspection.objects.get(id=inspection_id)
-                inspection.status = value
-                inspection.observation = request.POST.get(f'obs_{inspection_id}', '')
-                inspection.save()
-        
-        if vehicle.is_inspection_complete():
+        statuses = {choice for choice, _ in VehicleInspection.STATUS_CHOICES}
+        checklist = list(vehicle.inspection_checklist())
+
+        # Form fields are keyed by template id. Rows are only written for
+        # items that get an answer (or a note) and only when they changed;
+        # an item reset to unanswered without a note loses its row.
+        to_create, to_update, to_delete = [], [], []
+        answered = 0
+        for item in checklist:
+            status = request.POST.get(f'status_{item.pk}')
+            observation = request.POST.get(f'obs_{item.pk}', '')
+            if status in statuses and (item.status != status or (item.observation or '') != observation):
+                answer = VehicleInspection(
+                    pk=item.answer_id, vehicle=vehicle, template_id=item.pk,
+                    status=status, observation=observation,
+                )
+                if status == 'NAO_RESPONDIDO' and not observation:
+                    if item.answer_id:
+                        to_delete.append(item.answer_id)
+                elif item.answer_id:
+                    to_update.append(answer)
+                else:
+                    to_create.append(answer)
+                item.status = status
+            if item.status != 'NAO_RESPONDIDO':
+                answered += 1
+
+        vehicle.inspection_answered = answered
+        complete = vehicle.is_inspection_complete()
+        if complete:
             vehicle.status = 'DISPONIVEL'
-            vehicle.save()
+
+        if to_create or to_update or to_delete or complete:
+            with transaction.atomic():
+                # Bulk writes skip the per-row signals; the vehicle save below
+                # stores the counters and invalidates the dashboard instead.
+                # bulk_update skips auto_now: updated_at is set by hand so
+                # the report exports see the change (bulk_export.source_version)
+                now = timezone.now()
+                for answer in to_update:
+                    answer.updated_at = now
+                VehicleInspection.objects.bulk_create(
+                    to_create,
+                    update_conflicts=True,
+                    unique_fields=['vehicle', 'template'],
+                    update_fields=['status', 'observation', 'updated_at'],
+                )
+                VehicleInspection.objects.bulk_update(to_update, ['status', 'observation', 'updated_at'])
+                if to_delete:
+                    VehicleInspection.objects.filter(pk__in=to_delete).delete()
+                vehicle.save(update_fields=['inspection_answered', 'status', 'updated_at'])
+        
+        if complete:
             messages.success(request, 'Ficha técnica completa! Veículo marcado como DISPONÍVEL.')
         else:
             messages.info(request, f'Ficha técnica atualizada! Progresso: {vehicle.inspection_progress()}%')
         
         return redirect('vehicle_detail', pk=vehicle.id)
     
-    inspections = vehicle.inspections.select_related('template').order_by('template__order')
-    return render(request, 'inspection_form.html', {'vehicle': vehicle, 'inspections': inspections})
-
-def save_image_locally(file, vehicle, filename):
-    """
-    Save image to local directory media/images/
-    Filename format: NomeCarro_Ano_Modelo_originalname.ext
-    Returns the local file path or None if failed
-    """
-    try:
-        # Ensure directory exists
-        if not ensure_local_images_dir():
-            return None
-
-        # Create filename: NomeCarro_Ano_Modelo_originalname.ext
-        # Clean vehicle name for filename
-        clean_make = vehicle.make.replace(' ', '_').replace('/', '_')
-        clean_model = vehicle.model.replace(' ', '_').replace('/', '_')
-
-        # Get file extension
-        file_ext = os.path.splitext(filename)[1]
-        base_name = os.path.splitext(filename)[0]
-
-        # Create new filename
-        new_filename = f"{clean_make}_{vehicle.year}_{clean_model}_{base_name}{file_ext}"
-
-        # Full path
-        file_path = LOCAL_IMAGES_DIR / new_filename
-
-        # Save file
-        with open(file_path, 'wb+') as destination:
-            for chunk in file.chunks():
-                destination.write(chunk)
-
-        return str(file_path)
-    except Exception as e:
-        print(f"Error saving file locally: {e}")
-        return None
-
-def delete_local_image(file_path):
-    """Delete image from local storage"""
-    try:
-        if file_path and os.path.exists(file_path):
-            os.remove(file_path)
-            return True
-    except Exception as e:
-        print(f"Error deleting local file: {e}")
-    return False
+    return render(request, 'inspection_form.html', {'vehicle': vehicle, 'inspections': vehicle.inspection_checklist()})
 
 @login_required
 @user_passes_test(is_staff_user, login_url='/dashboard/')
@@ -364,38 +389,15 @@ def photo_upload(request, pk):
         files = request.FILES.getlist('photos')
         description = request.POST.get('description', '')
 
+        # Files are only staged here; photo_worker sends them to Cloudinary
+        staged = 0
         for file in files:
-            try:
-                # Upload to Cloudinary FIRST (before reading the file for local storage)
-                upload_result = cloudinary.uploader.upload(
-                    file,
-                    folder=f"kario_garage/vehicles/{vehicle.id}",
-                    resource_type="auto"
-                )
+            if stage_photo(file, vehicle, description, request.user):
+                staged += 1
+            else:
+                messages.error(request, f'Erro ao salvar imagem localmente: {file.name}')
 
-                # Reset file pointer to beginning before saving locally
-                file.seek(0)
-
-                # Save to local storage
-                local_path = save_image_locally(file, vehicle, file.name)
-
-                if not local_path:
-                    messages.error(request, f'Erro ao salvar imagem localmente: {file.name}')
-                    continue
-
-                Photo.objects.create(
-                    vehicle=vehicle,
-                    image_url=upload_result['secure_url'],
-                    cloudinary_public_id=upload_result['public_id'],
-                    google_drive_id=local_path,  # Storing local path in this field now
-                    description=description,
-                    uploaded_by=request.user
-                )
-            except Exception as e:
-                messages.error(request, f'Erro ao fazer upload da imagem: {str(e)}')
-                continue
-
-        messages.success(request, f'{len(files)} foto(s) adicionada(s) e salvas em media/images/')
+        messages.success(request, f'{staged} foto(s) adicionada(s)! O envio para a nuvem continua em segundo plano.')
         return redirect('vehicle_detail', pk=vehicle.id)
 
     return render(request, 'photo_upload.html', {'vehicle': vehicle})
@@ -406,58 +408,44 @@ def photo_delete(request, pk):
     photo = get_object_or_404(Photo, pk=pk)
     vehicle_id = photo.vehicle.id
 
+    # Files shared with identical photos are kept until the last one goes
     try:
-        if photo.cloudinary_public_id:
-            cloudinary.uploader.destroy(photo.cloudinary_public_id)
+        delete_photo(photo)
     except Exception as e:
         messages.warning(request, f'Foto removida do banco, mas erro ao deletar do Cloudinary: {str(e)}')
 
-    # Delete from local storage if exists
-    if photo.google_drive_id:  # This field now stores local path
-        delete_local_image(photo.google_drive_id)
-
-    photo.delete()
     messages.success(request, 'Foto removida!')
     return redirect('vehicle_detail', pk=vehicle_id)
 
 @login_required
-def report_inventory(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="inventario_{datetime.now().strftime("%Y%m%d")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Ano', 'Marca', 'Modelo', 'VIN', 'Cor', 'Milhas', 'Valor', 'Status', 'Título'])
-    
-    for vehicle in Vehicle.objects.filter(status='DISPONIVEL'):
-        writer.writerow([vehicle.year, vehicle.make, vehicle.model, vehicle.vin, vehicle.exterior_color, 
-                        vehicle.miles, vehicle.value, vehicle.status, vehicle.title_status])
-    
-    return response
+@use_replica
+def report_export(request, name):
+    report = reports.REPORTS.get(name)
+    if report is None:
+        raise Http404('Relatório não encontrado')
+    try:
+        return reports.export(report, request.GET.get('format', 'csv'), request.GET)
+    except reports.ReportError as e:
+        return HttpResponseBadRequest(str(e))
 
-@login_required
-def report_mechanics(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="mecanica_{datetime.now().strftime("%Y%m%d")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Ano', 'Marca', 'Modelo', 'VIN', 'Itens para Reparar'])
-    
-    for vehicle in Vehicle.objects.filter(status='MECANICA'):
-        repairs = vehicle.inspections.filter(status='SIM').values_list('template__item_name', flat=True)
-        writer.writerow([vehicle.year, vehicle.make, vehicle.model, vehicle.vin, ', '.join(repairs)])
-    
-    return response
 
 @login_required
-def report_sales(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="vendas_{datetime.now().strftime("%Y%m%d")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Data', 'Ano', 'Marca', 'Modelo', 'VIN', 'Preço Venda', 'Comprador'])
-    
-    for sale in Sale.objects.select_related('vehicle').order_by('-sale_date'):
-        writer.writerow([sale.sale_date, sale.vehicle.year, sale.vehicle.make, sale.vehicle.model, 
-                        sale.vehicle.vin, sale.sale_price, sale.buyer_name])
-    
-    return response
\ No newline at end of file
+@use_replica
+def report_bulk(request, name):
+    """Whole report as Parquet (or gzip NDJSON), cached until its source tables change"""
+    report = reports.REPORTS.get(name)
+    if report is None:
+        raise Http404('Relatório não encontrado')
+
+    version = bulk_export.source_version(report)
+    etag = f'"{version}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        extension, content_type = bulk_export.export_format()
+        response = FileResponse(
+            open(bulk_export.get_export(report, version), 'rb'),
+            as_attachment=True, filename=f'{report.filename}.{extension}', content_type=content_type,
+        )
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,231 @@
+import asyncio
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import timedelta
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .models import VinDecode
+from .vin_offline import decode_offline
+
+VIN_RE = re.compile(r'[^A-Z0-9]')
+
+
+class VinDecodeError(Exception):
+    pass
+
+
+class LRUCache:
+    """Small thread-safe LRU with per-entry expiry, used in front of VinDecode"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= timezone.now():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_memory_cache = LRUCache(settings.VIN_DECODE_LRU_SIZE)
+
+
+def clear_memory_cache():
+    _memory_cache.clear()
+
+
+def normalize_vin(vin):
+    return VIN_RE.sub('', (vin or '').upper())
+
+
+def normalize_year(year):
+    year = str(year or '').strip()
+    return year if re.fullmatch(r'\d{4}', year) else ''
+
+
+def vpic_variables(results):
+    """vPIC Results list -> {Variable: Value}"""
+    return {item['Variable']: item['Value'] for item in results if item.get('Variable')}
+
+
+def _store(vin, year, results, error=''):
+    ttl = settings.VIN_DECODE_NEGATIVE_TTL if error else settings.VIN_DECODE_TTL
+    now = timezone.now()
+    row, created = VinDecode.objects.update_or_create(
+        vin=vin,
+        model_year=year,
+        defaults={
+            'results': results,
+            'error': error[:255],
+            'fetched_at': now,
+            'expires_at': now + timedelta(seconds=ttl),
+        },
+    )
+    # Only a new row can push the table over its limit; expired rows are
+    # refetched on read and swept by purge_vin_cache
+    if created and VinDecode.objects.count() > settings.VIN_DECODE_CACHE_MAX_ROWS:
+        evict_expired()
+    return row
+
+
+def evict_expired(max_rows=None):
+    """
+    Drop expired rows, then the ones closest to expiring above
+    VIN_DECODE_CACHE_MAX_ROWS. Both deletes filter on the expires_at index.
+    """
+    max_rows = settings.VIN_DECODE_CACHE_MAX_ROWS if max_rows is None else max_rows
+    deleted, _ = VinDecode.objects.filter(expires_at__lte=timezone.now()).delete()
+    overflow = VinDecode.objects.count() - max_rows
+    if overflow > 0:
+        # Rows tied with the cutoff go too
+        cutoff = VinDecode.objects.order_by('expires_at').values_list('expires_at', flat=True)[overflow - 1]
+        deleted += VinDecode.objects.filter(expires_at__lte=cutoff).delete()[0]
+    return deleted
+
+
+def _lookup_error(results):
+    return '' if vpic_variables(results).get('Make') else 'VIN não decodificado'
+
+
+def _row_variables(row):
+    if row.error:
+        raise VinDecodeError(row.error)
+    return vpic_variables(row.results)
+
+
+# One pooled client and one in-flight table per event loop
+_async_clients = weakref.WeakKeyDictionary()
+_inflight = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """Shared keep-alive client for vPIC, bound to the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=settings.VPIC_API_URL,
+            timeout=httpx.Timeout(settings.VPIC_TIMEOUT, connect=settings.VPIC_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.VPIC_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.VPIC_MAX_CONNECTIONS,
+                keepalive_expiry=30,
+            ),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_client():
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def afetch_vpic(vin, year):
+    """Raw `Results` payload from vPIC DecodeVin over the pooled client (raises VinDecodeError)"""
+    try:
+        response = await get_async_client().get(
+            f'/vehicles/DecodeVin/{vin}', params={'format': 'json', 'modelyear': year},
+        )
+        response.raise_for_status()
+        return response.json().get('Results', [])
+    except (httpx.HTTPError, ValueError) as e:
+        raise VinDecodeError(str(e) or type(e).__name__) from e
+
+
+async def _afetch_and_store(vin, year):
+    try:
+        results = await afetch_vpic(vin, year)
+        error = _lookup_error(results)
+    except VinDecodeError as e:
+        results, error = [], str(e)
+    return await sync_to_async(_store)(vin, year, results, error)
+
+
+async def adecode_vin(vin, year=''):
+    """
+    Decode a VIN through the local caches, hitting vPIC only on a miss.
+    Returns {Variable: Value}; failed lookups raise VinDecodeError and are
+    cached for VIN_DECODE_NEGATIVE_TTL so retries don't hammer the API.
+    Concurrent misses for the same VIN/year share a single upstream request
+    instead of each opening their own.
+    """
+    vin, year = normalize_vin(vin), normalize_year(year)
+    key = (vin, year)
+
+    row = _memory_cache.get(key)
+    if row is None:
+        row = await VinDecode.objects.filter(vin=vin, model_year=year, expires_at__gt=timezone.now()).afirst()
+        if row is None:
+            inflight = _inflight.setdefault(asyncio.get_running_loop(), {})
+            task = inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(_afetch_and_store(vin, year))
+                inflight[key] = task
+                task.add_done_callback(lambda _: inflight.pop(key, None))
+            # shield: one cancelled caller must not cancel the others' fetch
+            row = await asyncio.shield(task)
+        _memory_cache.set(key, row, row.expires_at)
+
+    return _row_variables(row)
+
+
+async def avehicle_data_from_vin(vin, year=''):
+    """
+    Fields for vehicle_form.html pre-fill. The local vPIC subset answers
+    first; the remote API is only called when it can't name the model, and
+    a partial local decode is still returned if that call fails.
+    """
+    vin, year = normalize_vin(vin), normalize_year(year)
+    results = await sync_to_async(decode_offline)(vin, year) or {}
+    if not results.get('Model'):
+        try:
+            results = _merge(results, await adecode_vin(vin, year))
+        except VinDecodeError:
+            if not results.get('Make'):
+                raise
+    return _vehicle_data(vin, year, results)
+
+
+def _merge(local, remote):
+    return {**local, **{name: value for name, value in remote.items() if value}}
+
+
+def _vehicle_data(vin, year, results):
+    return {
+        'vin': vin,
+        'year': results.get('Model Year') or year,
+        'make': results.get('Make') or '',
+        'model': results.get('Model') or '',
+        'trim': results.get('Trim') or '',
+        'engine': results.get('Engine Model') or '',
+        'transmission': results.get('Transmission Style') or '',
+    }
@@ -0,0 +1,161 @@
+"""
+Offline VIN decoding from the local vPIC subset (VinWmi / VinPattern / VinPlant).
+
+Everything is loaded once into per-process dictionaries, so a decode is a
+handful of dict lookups. Output uses the same variable names as vPIC
+DecodeVin so callers can treat both sources alike.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+from .models import VinWmi, VinPattern, VinPlant
+
+VPIC_VERSION_KEY = 'garage:vpic_version'
+
+# How often a worker checks whether import_vpic_data loaded new data
+VERSION_CHECK_INTERVAL = 60
+
+TRANSLITERATION = {
+    **{str(d): d for d in range(10)},
+    'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6, 'G': 7, 'H': 8,
+    'J': 1, 'K': 2, 'L': 3, 'M': 4, 'N': 5, 'P': 7, 'R': 9,
+    'S': 2, 'T': 3, 'U': 4, 'V': 5, 'W': 6, 'X': 7, 'Y': 8, 'Z': 9,
+}
+WEIGHTS = [8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2]
+
+# Position 10 codes; the sequence repeats every 30 years from 1980
+YEAR_CODES = 'ABCDEFGHJKLMNPRSTVWXY123456789'
+
+
+def check_digit(vin):
+    """Expected position-9 character, or None if the VIN has invalid characters"""
+    try:
+        total = sum(TRANSLITERATION[char] * weight for char, weight in zip(vin, WEIGHTS))
+    except KeyError:
+        return None
+    remainder = total % 11
+    return 'X' if remainder == 10 else str(remainder)
+
+
+def is_valid_vin(vin):
+    return len(vin) == 17 and check_digit(vin) == vin[8]
+
+
+def model_year(vin, hint=''):
+    """
+    Resolve the position-10 year code. A numeric position 7 means the
+    1980-2009 cycle and a letter the 2010-2039 one (49 CFR 565); an
+    explicit hint wins when it is one of the candidates.
+    """
+    index = YEAR_CODES.find(vin[9])
+    if index < 0:
+        return None
+    candidates = [1980 + index, 2010 + index]
+    if hint and int(hint) in candidates:
+        return int(hint)
+    return candidates[0] if vin[6].isdigit() else candidates[1]
+
+
+def wmi_keys(vin):
+    """Small manufacturers (3rd char '9') are identified by positions 1-3 + 12-14"""
+    if vin[2] == '9':
+        return [vin[:3] + vin[11:14], vin[:3]]
+    return [vin[:3]]
+
+
+class OfflineDecoder:
+    def __init__(self):
+        self.wmis = {
+            code: (make, manufacturer, vehicle_type)
+            for code, make, manufacturer, vehicle_type
+            in VinWmi.objects.values_list('code', 'make', 'manufacturer', 'vehicle_type').iterator()
+        }
+        self.plants = {
+            (wmi, code): (city, country)
+            for wmi, code, city, country
+            in VinPlant.objects.values_list('wmi', 'code', 'city', 'country').iterator()
+        }
+        self.patterns = {}
+        for wmi, vds, year_from, year_to, model, trim, engine in VinPattern.objects.values_list(
+                'wmi', 'vds', 'year_from', 'year_to', 'model', 'trim', 'engine').iterator():
+            # Fixed positions only, so matching is a few char compares
+            fixed = tuple((i, char) for i, char in enumerate(vds) if char != '*')
+            self.patterns.setdefault(wmi, []).append(
+                (fixed, year_from or 0, year_to or 9999, model, trim, engine)
+            )
+        for patterns in self.patterns.values():
+            # Most specific pattern first
+            patterns.sort(key=lambda p: len(p[0]), reverse=True)
+
+    def match_pattern(self, wmi, vds, year):
+        for fixed, year_from, year_to, model, trim, engine in self.patterns.get(wmi, ()):
+            if year is not None and not (year_from <= year <= year_to):
+                continue
+            if all(vds[i] == char for i, char in fixed):
+                return model, trim, engine
+        return None
+
+    def decode(self, vin, year=''):
+        """
+        {vPIC variable: value} for what the local data knows about `vin`,
+        or None when its WMI is unknown.
+        """
+        if len(vin) != 17:
+            return None
+        wmi = next((key for key in wmi_keys(vin) if key in self.wmis), None)
+        if wmi is None:
+            return None
+
+        make, manufacturer, vehicle_type = self.wmis[wmi]
+        resolved_year = model_year(vin, year)
+        results = {
+            'Make': make,
+            'Manufacturer Name': manufacturer,
+            'Vehicle Type': vehicle_type,
+            'Model Year': str(resolved_year) if resolved_year else '',
+            'Error Code': '0' if is_valid_vin(vin) else '1',
+        }
+
+        match = self.match_pattern(wmi, vin[3:8], resolved_year)
+        if match:
+            results['Model'], results['Trim'], results['Engine Model'] = match
+
+        plant = self.plants.get((wmi, vin[10]))
+        if plant:
+            results['Plant City'], results['Plant Country'] = plant
+        return results
+
+
+_decoder = None
+_decoder_version = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_decoder():
+    """Process-wide decoder, reloaded when import_vpic_data bumps the version"""
+    global _decoder, _decoder_version, _checked_at
+
+    now = time.monotonic()
+    if _decoder is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return _decoder
+    with _lock:
+        version = cache.get(VPIC_VERSION_KEY)
+        if _decoder is None or version != _decoder_version:
+            _decoder = OfflineDecoder()
+            _decoder_version = version
+        _checked_at = now
+    return _decoder
+
+
+def reset_decoder():
+    """Force every process to reload the local data on its next decode"""
+    global _decoder
+    cache.set(VPIC_VERSION_KEY, time.time(), None)
+    _decoder = None
+
+
+def decode_offline(vin, year=''):
+    return get_decoder().decode(vin, year)
@@ -0,0 +1,27 @@
+"""
+Settings for the test suite: `python manage.py test` selects this module,
+other runners need DJANGO_SETTINGS_MODULE=kario.test_settings.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, LOGGING
+
+# Test runs must not read or invalidate the shared on-disk cache
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# A replica in a SQLite file of its own, apart from the primary, which stays
+# in memory (shared with the photo worker threads). The replica tests turn
+# the router on with REPLICA_DATABASE.
+if 'replica' not in DATABASES and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'TEST': {'NAME': str(Path(tempfile.gettempdir()) / f'kario-test-replica-{os.getpid()}.sqlite3')},
+    }
+REPLICA_DATABASE = None
+
+QUERY_BUDGETS_STRICT = True
+
+LOGGING['loggers']['garage.access']['level'] = 'WARNING'
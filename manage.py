@@ -7,7 +7,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kario.settings')
+    # The test command gets the test-only overrides of kario/test_settings.py
+    settings_module = 'kario.test_settings' if sys.argv[1:2] == ['test'] else 'kario.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
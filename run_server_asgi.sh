@@ -0,0 +1,38 @@
+#!/bin/bash
+
+# Script para rodar o servidor Django em modo ASGI (Uvicorn)
+# As views assíncronas (ex: decodificação de VIN) não prendem um worker
+# enquanto aguardam a API externa.
+
+# Ativar ambiente virtual se existir
+if [ -d "venv" ]; then
+    source venv/bin/activate
+fi
+
+# Obter IP local
+IP=$(hostname -I | awk '{print $1}')
+
+echo "========================================"
+echo "Iniciando servidor Django com Uvicorn (ASGI)"
+echo "========================================"
+echo ""
+echo "Acesse pelo navegador:"
+echo "  - Local: http://127.0.0.1:8000"
+echo "  - Rede local: http://$IP:8000"
+echo ""
+echo "Pressione Ctrl+C para parar o servidor"
+echo "========================================"
+echo ""
+
+# Com PostgreSQL, use DB_POOL=True e deixe DB_CONN_MAX_AGE em 0: conexões
+# persistentes ficam presas às threads do ORM e esgotam o banco
+
+# Rodar Uvicorn
+# - workers 3 define 3 processos workers (cada um com seu event loop)
+# - timeout-keep-alive mantém conexões HTTP abertas entre requisições
+uvicorn kario.asgi:application \
+    --host 0.0.0.0 \
+    --port 8000 \
+    --workers 3 \
+    --timeout-keep-alive 5 \
+    --access-log
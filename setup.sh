@@ -31,6 +31,7 @@ echo "✓ Dependências instaladas"
 echo ""
 echo "Executando migrações do banco de dados..."
 python manage.py migrate
+python manage.py import_vpic_data
 echo "✓ Banco de dados configurado"
 
 echo ""